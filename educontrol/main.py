@@ -2,14 +2,21 @@
 Proyecto EduControl
 """
 
-from src.utils.logging.logger_factory import setup_logging
+from src.utils.logging.logger_factory import setup_logging, get_logger
 from src.extract_data_flow import extract_courses_data_flow
+from src.async_extract_data_flow import extract_courses_data_flow_async
+from src.settings import settings
 from src.utils.db import get_db, get_available_api_lms
 from src.build_report_json_flow import main_build_report
 from src.build_report import MakeQuantitativeReport, make_report
-from src.utils.redis_client import RedisClient
+from src.build_report_json import COURSE_REPORTS_LIST
+from src.streaming_flow import stream_quantitative_report
+from src.utils.redis_client import RedisClient, run_namespace
+from src.utils.run_manifest import RunManifest, EXTRACTING, BUILDING, REPORTING, REPORTED, BUILT
 from src.utils.category_finder import GradeCategoryBuilder, PostCategoryBuilder
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
+import argparse
 
 
 test_params = {
@@ -36,29 +43,127 @@ test_prof = {
     "activity-cort-1": 1,
 }
 
+logger = get_logger()
+
 CATEGORY_BUILDER = {
     "CESDEL-CARRERAS(NEW)": GradeCategoryBuilder,
     "CESDEL-POST(NEW)": PostCategoryBuilder,
 }
 
-def main():
+def run_redis_pipeline(
+    api_lms, manifest: RunManifest, redis_client: RedisClient
+) -> dict:
+    """
+    Extracción a Redis, construcción de los reportes por curso y reporte
+    cuantitativo, registrando cada etapa en el manifiesto de la ejecución.
+    """
+    stage = manifest.lms_stage(api_lms.lmsName)
+    if stage == REPORTING:
+        # El reporte vacía la lista de Redis: se reconstruyen todas las filas
+        manifest.reset(api_lms.lmsName, BUILT)
+        redis_client.client.delete(redis_client.key(COURSE_REPORTS_LIST))
+    ofg_pos = api_lms.report_params["ofg_pos"]
+    manifest.set_lms_stage(api_lms.lmsName, EXTRACTING)
+    if settings.EXTRACTION_ENGINE == "asyncio":
+        extract_courses_data_flow_async(
+            api_lms,
+            incremental=settings.INCREMENTAL_EXTRACTION,
+            manifest=manifest,
+            namespace=redis_client.namespace,
+        )
+    else:
+        extract_courses_data_flow(
+            api_lms,
+            incremental=settings.INCREMENTAL_EXTRACTION,
+            manifest=manifest,
+            namespace=redis_client.namespace,
+        )
+    manifest.set_lms_stage(api_lms.lmsName, BUILDING)
+    main_build_report(api_lms.periods, ofg_pos, api_lms.lmsName, manifest, redis_client.namespace)
+    manifest.set_lms_stage(api_lms.lmsName, REPORTING)
+    return MakeQuantitativeReport(
+        redis_client,
+        CATEGORY_BUILDER[api_lms.lmsName](),
+        api_lms.report_params,
+        api_lms.current_cort,
+        api_lms.lmsName,
+    )
+
+
+def run_lms_pipeline(api_lms, manifest: RunManifest) -> str | None:
+    """
+    Pipeline completo de un LMS: extracción, reportes por curso y Excel. Cada LMS
+    usa su propio namespace de Redis, su propio MoodleClient con el throttle de
+    su report_params y sus propios workers.
+
+    Returns:
+        str | None: Nombre del reporte generado, o None si ya estaba reportado
+    """
+    # Claves aisladas por ejecución y LMS: varios LMS o jobs pueden compartir Redis
+    namespace = run_namespace(manifest.run_id, api_lms.lmsName)
+    redis_client = RedisClient(namespace)
+    if manifest.lms_stage(api_lms.lmsName) == REPORTED:
+        logger.info(f"{api_lms.lmsName} ya fue reportado en esta ejecución, se omite")
+        return None
+    if settings.PIPELINE_MODE == "streaming":
+        # Sin checkpoints por curso: el LMS se procesa completo en memoria
+        manifest.set_lms_stage(api_lms.lmsName, EXTRACTING)
+        excel_rep = stream_quantitative_report(
+            api_lms,
+            CATEGORY_BUILDER[api_lms.lmsName](),
+            incremental=settings.INCREMENTAL_EXTRACTION,
+            persist=settings.STREAM_PERSIST_TO_REDIS,
+            namespace=namespace,
+        )
+    else:
+        excel_rep = run_redis_pipeline(api_lms, manifest, redis_client)
+    filename = f"reporte_{api_lms.lmsName}_{pd.Timestamp.now().strftime('%Y%m%d')}-{api_lms.current_cort}.xlsx"
+    filename = make_report(
+        excel_rep["excel"],
+        filename=filename,
+        metadata={"LMS": api_lms.lmsName, "CORTE": api_lms.current_cort},
+    )
+    manifest.set_lms_stage(api_lms.lmsName, REPORTED)
+    if settings.PIPELINE_MODE != "streaming" or not settings.STREAM_PERSIST_TO_REDIS:
+        redis_client.delete_namespace()
+    return filename
+
+
+def main(resume: bool = False):
     setup_logging()
     db = next(get_db())
-    redis_client = RedisClient()
+    manifest = RunManifest.start(resume=resume)
     available_api_lms = get_available_api_lms(db)
-    for api_lms in available_api_lms:
-        ofg_pos = api_lms.report_params["ofg_pos"]
-        extract_courses_data_flow(api_lms, max_workers=8)
-        main_build_report(api_lms.periods, ofg_pos)
-        excel_rep = MakeQuantitativeReport(
-            redis_client,
-            CATEGORY_BUILDER[api_lms.lmsName](),
-            api_lms.report_params,
-            api_lms.current_cort,
-        )
-        make_report(excel_rep["excel"], filename=f"reporte_{api_lms.lmsName}_{pd.Timestamp.now().strftime('%Y%m%d')}-{api_lms.current_cort}.xlsx")
-        redis_client.client.flushall()
+    # Cada LMS apunta a un servidor distinto: sus pipelines corren en paralelo y
+    # el fallo de uno no detiene a los demás
+    failed = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(settings.LMS_MAX_PARALLEL, len(available_api_lms)))) as executor:
+        future_to_lms = {
+            executor.submit(run_lms_pipeline, api_lms, manifest): api_lms.lmsName
+            for api_lms in available_api_lms
+        }
+        for future in as_completed(future_to_lms):
+            lms = future_to_lms[future]
+            try:
+                filename = future.result()
+                if filename:
+                    logger.info(f"Reporte de {lms} generado: {filename}")
+            except Exception as e:
+                failed[lms] = str(e)
+                logger.error(f"Error procesando el LMS {lms}: {e}")
+    if failed:
+        # La ejecución queda abierta para retomar solo los LMS fallidos con --resume
+        logger.error(f"LMS con errores en la ejecución {manifest.run_id}: {', '.join(failed)}")
+    else:
+        manifest.finish()
+    manifest.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Reportes de EduControl")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Retoma la última ejecución interrumpida en lugar de empezar de cero",
+    )
+    main(resume=parser.parse_args().resume)
@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict
+
+from src.extract_data_flow import TEMPLATE
+from src.schemas import MoodleAPIConn
+from src.settings import settings
+from src.utils.async_moodle_client import AsyncMoodleClient
+from src.utils.course_state import CourseStateStore
+from src.utils.run_manifest import RunManifest, EXTRACTED
+from src.utils.parsers import extract_course_info_async
+from src.utils.redis_client import RedisClient
+from src.utils.throttle import AsyncThrottle, ThrottleConfig
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+
+async def process_course_async(
+    course: Dict[Any, Any],
+    period: str,
+    moodle_client: AsyncMoodleClient,
+    redis_client: RedisClient,
+    state_store: CourseStateStore | None = None,
+    manifest: RunManifest | None = None,
+) -> bool:
+    """
+    Procesa un curso individual de forma asíncrona y guarda su información en Redis.
+
+    Args:
+        course: Diccionario con los metadatos del curso (core_course_get_courses_by_field)
+        period: Período académico
+        moodle_client: Cliente asíncrono de Moodle
+        redis_client: Cliente de Redis
+        state_store: Estado de la última extracción (solo en modo incremental)
+        manifest: Registro de avance de la ejecución, para poder retomarla
+
+    Returns:
+        bool: True si el curso fue procesado exitosamente, False en caso contrario
+    """
+    logger.info(f"Extrayendo información del curso {course['shortname']}")
+
+    try:
+        course_info = state_store and await asyncio.to_thread(
+            state_store.get_unchanged, moodle_client.name, course
+        )
+        if course_info:
+            logger.info(f"Curso {course['shortname']} sin cambios, se reutiliza la extracción anterior")
+        else:
+            course_info = await extract_course_info_async(course, moodle_client)
+            if course_info and state_store:
+                await asyncio.to_thread(state_store.save, moodle_client.name, course, course_info)
+        if course_info:
+            # Redis es síncrono: se delega a un hilo para no bloquear el event loop
+            await asyncio.to_thread(
+                redis_client.save_hset,
+                redis_client.key(period, course["shortname"], datetime.now().strftime("%Y-%m-%d")),
+                course_info,
+            )
+            if manifest:
+                await asyncio.to_thread(
+                    manifest.mark_done, moodle_client.name, period, EXTRACTED, course["id"]
+                )
+            logger.info(f"Información del curso {course['shortname']} extraída")
+            return True
+    except Exception as e:
+        logger.error(f"Error procesando curso {course['shortname']}: {str(e)}")
+
+    return False
+
+
+async def _extract_courses_data_async(
+    moodle_api_conn: MoodleAPIConn,
+    throttle_config: ThrottleConfig,
+    state_store: CourseStateStore | None,
+    manifest: RunManifest | None,
+    namespace: str,
+):
+    redis_client = RedisClient(namespace)
+    # El throttle se crea dentro del event loop que lo va a usar
+    throttle = AsyncThrottle(throttle_config, moodle_api_conn.lmsName)
+    async with AsyncMoodleClient(
+        moodle_api_conn.url,
+        moodle_api_conn.token,
+        moodle_api_conn.lmsName,
+        throttle=throttle,
+    ) as moodle_client:
+        for period in moodle_api_conn.periods:
+            logger.info(f"Extrayendo información de los cursos del periodo {period}")
+            courses = await moodle_client.search_courses(period)
+            filtered_courses = [
+                course for course in courses or [] if TEMPLATE not in course["shortname"]
+            ]
+            if manifest:
+                extracted = manifest.done(moodle_client.name, period, EXTRACTED)
+                filtered_courses = [
+                    course for course in filtered_courses if str(course["id"]) not in extracted
+                ]
+            if not filtered_courses:
+                logger.info(f"No se encontraron cursos válidos para el periodo {period}")
+                continue
+
+            courses_metadata = await moodle_client.get_courses_by_ids(
+                [course["id"] for course in filtered_courses]
+            )
+
+            logger.info(
+                f"Procesando {len(courses_metadata)} cursos con hasta "
+                f"{throttle.config.max_concurrency} peticiones concurrentes"
+            )
+            results = await asyncio.gather(
+                *(
+                    process_course_async(
+                        course, period, moodle_client, redis_client, state_store, manifest
+                    )
+                    for course in courses_metadata
+                )
+            )
+            logger.info(f"Información procesada. Total procesados: {sum(results)}")
+
+
+def extract_courses_data_flow_async(
+    moodle_api_conn: MoodleAPIConn,
+    max_concurrency: int | None = None,
+    incremental: bool = False,
+    manifest: RunManifest | None = None,
+    namespace: str = "",
+):
+    """
+    Alternativa asyncio a extract_courses_data_flow: en lugar de repartir los
+    cursos entre hilos, todas las llamadas a Moodle de todos los cursos se
+    lanzan en un único event loop. Las peticiones pasan por el mismo throttle
+    que en la extracción con hilos (report_params["throttle"] del LMS: rate
+    limit y concurrencia AIMD), en su versión asyncio.
+
+    Args:
+        moodle_api_conn: Configuración de conexión a Moodle
+        max_concurrency: Máximo de peticiones HTTP simultáneas contra el LMS
+            (por defecto, ASYNC_MAX_CONCURRENCY o, si no está definido, la
+            concurrencia máxima del throttle del LMS)
+        incremental: Reutiliza los cursos que no cambiaron desde la última ejecución
+        manifest: Registro de avance; los cursos ya extraídos en la ejecución se omiten
+        namespace: Namespace de Redis de la ejecución (run:{id}:{lms})
+    """
+    throttle_config = ThrottleConfig.from_params(moodle_api_conn.report_params)
+    max_concurrency = max_concurrency or settings.ASYNC_MAX_CONCURRENCY
+    if max_concurrency:
+        throttle_config = throttle_config.model_copy(update={"max_concurrency": max_concurrency})
+    state_store = CourseStateStore() if incremental else None
+    try:
+        asyncio.run(
+            _extract_courses_data_async(
+                moodle_api_conn,
+                throttle_config,
+                state_store,
+                manifest,
+                namespace,
+            )
+        )
+    finally:
+        if state_store:
+            state_store.close()
@@ -1,29 +1,50 @@
-import json
+import numpy as np
 import pandas as pd
+from collections.abc import Iterable
 from datetime import datetime
+from operator import itemgetter
 
+from src.settings import settings
 from src.utils.redis_client import RedisClient
+from src.utils.codecs import decode_value
+from src.utils.excel import apply_openpyxl_widths, plan_column_widths
+from src.utils.columnar import write_parquet
+from src.utils.report_history import ReportHistory
 from src.utils.logging.logger_factory import get_logger
 from src.utils.category_finder import CategoryBuilder
+from src.build_report_json import COURSE_REPORTS_LIST
+
+try:
+    import xlsxwriter
+    from xlsxwriter.utility import xl_col_to_name
+except ImportError:  # openpyxl queda como respaldo
+    xlsxwriter = None
 
 logger = get_logger()
 
 
 def get_courses_data(redis_client: RedisClient):
-    result_contentTotals = []
     result_modulesIndexes = {}
+    reports_key = redis_client.key(COURSE_REPORTS_LIST)
     logger.info(
-        f"Getting courses data from redis {redis_client.client.llen('total_report_json')}"
+        f"Getting courses data from redis {redis_client.client.llen(reports_key)}"
     )
-    while redis_client.client.llen("total_report_json") > 0:
-        slice_contentTotals_i = json.loads(
-            redis_client.client.lpop("total_report_json")
-        )
-        slice_moduleIndexes_i = json.loads(redis_client.client.lpop("module_indexes"))
-        if slice_contentTotals_i:
-            result_contentTotals.append(slice_contentTotals_i)
-        if slice_moduleIndexes_i:
-            result_modulesIndexes |= slice_moduleIndexes_i
+    # Un curso puede llegar más de una vez: si la ejecución se cortó entre el
+    # push y el registro de BUILT en el manifiesto, --resume lo vuelve a
+    # construir (y SCAN puede repetir claves). Se conserva el último reporte.
+    reports = {}
+    total_records = 0
+    # La lista se vacía por lotes (LRANGE + LTRIM) en lugar de un LPOP por elemento
+    for values in redis_client.drain_list(reports_key):
+        for record in map(decode_value, values):
+            if record["report"]:
+                total_records += 1
+                reports[record["course"]] = record["report"]
+            if record["module_indexes"]:
+                result_modulesIndexes |= record["module_indexes"]
+    result_contentTotals = list(reports.values())
+    if duplicates := total_records - len(result_contentTotals):
+        logger.warning(f"{duplicates} course reports were duplicated and ignored")
     return result_contentTotals, result_modulesIndexes
 
 
@@ -84,9 +105,55 @@ def MakeQuantitativeReport(
     category_builder: CategoryBuilder,
     params: dict,
     parcial_cut: int,
+    lms: str | None = None,
 ):
     rep_content, _ = get_courses_data(redis_client)
+    return build_quantitative_report(rep_content, category_builder, params, parcial_cut, lms)
+
+
+def build_quantitative_report(
+    rep_content: Iterable[dict],
+    category_builder: CategoryBuilder,
+    params: dict,
+    parcial_cut: int,
+    lms: str | None = None,
+    engine: str | None = None,
+):
+    """
+    Construye las filas del reporte cuantitativo a partir de los reportes de
+    cursos. rep_content puede ser un generador: los cursos se consumen de uno
+    en uno y solo se conserva lo que va al reporte. engine (por defecto
+    settings.REPORT_ENGINE) elige entre el motor por columnas ("pandas") y el
+    de fila por fila ("rows"). Si se indica el LMS, las filas se guardan
+    además en el histórico de reportes del día.
+    """
     logger.info("Iniciando reporte cuantitativo")
+    engine = engine or settings.REPORT_ENGINE
+    if engine == "rows":
+        excel_rep, courses_withoutTeacher, courses_withProblems = _build_rows(
+            rep_content, category_builder, params, parcial_cut
+        )
+    else:
+        excel_rep, courses_withoutTeacher, courses_withProblems = _build_columnar(
+            rep_content, category_builder, params, parcial_cut
+        )
+    logger.info("Reporte cuantitativo finalizado")
+    if lms and settings.REPORT_HISTORY_ENABLED:
+        try:
+            with ReportHistory() as history:
+                history.append(lms, parcial_cut, excel_rep)
+        except Exception as e:
+            logger.error(f"Error guardando el histórico del reporte de {lms}: {e}")
+    return {
+        "excel": excel_rep,
+        "SIN PROFESORES": courses_withoutTeacher,
+        "CON PROBLEMAS": courses_withProblems,
+    }
+
+
+def _build_rows(
+    rep_content: Iterable[dict], category_builder: CategoryBuilder, params: dict, parcial_cut: int
+) -> tuple[list[dict], list[str], list[str]]:
     courses_withoutTeacher = []
     courses_withProblems = []
     excel_rep = []
@@ -131,7 +198,7 @@ def MakeQuantitativeReport(
                 "CF-ACTF": course["CF-ACTF"],
                 **parse_activities_totals(course, params, parcial_cut),
             }
-            if row["TIPO APROBACION"] not in ["APROBACION REGULAR", "APROBACION TUTORIA"]:
+            if row["TIPO APROBACION"] not in TIPOS_APROBACION:
                 continue
             excel_rep.append(row)
         except Exception as e:
@@ -139,273 +206,522 @@ def MakeQuantitativeReport(
             courses_withProblems.append(course["course_name"])
             continue
         del row
-    logger.info("Reporte cuantitativo finalizado")
-    return {
-        "excel": excel_rep,
-        "SIN PROFESORES": courses_withoutTeacher,
-        "CON PROBLEMAS": courses_withProblems,
-    }
+    return excel_rep, courses_withoutTeacher, courses_withProblems
+
+
+# Campos del reporte de cada curso que pasan al reporte cuantitativo, con su columna
+COURSE_FIELDS = {
+    "course_name": "NOMBRE",
+    "OFG": "OFG",
+    "Total_Estudiantes": "CANT_ESTUDIANTES",
+    "Total_Secciones": "secciones",
+    "T_links_clases": "links_clases",
+    "T_links": "links",
+    "T_archivos": "archivos",
+    "T_label": "labels",
+    "T_pags": "pags",
+    "T_libros": "libros",
+    "T_tareas": "tareas",
+    "T_quiz": "quiz",
+    "T_glosario": "glosario",
+    "T_taller": "taller",
+    "T_leccion": "leccion",
+    "T_foro": "foro",
+    "T_wiki": "wiki",
+    "T_chat": "chat",
+    "T_mapaMental": "mapaMental",
+    "CP1-ACT": "CP1-ACT",
+    "CP1-ACTF": "CP1-ACTF",
+    "CP2-ACT": "CP2-ACT",
+    "CP2-ACTF": "CP2-ACTF",
+    "CP3-ACT": "CP3-ACT",
+    "CP3-ACTF": "CP3-ACTF",
+    "CS-ACTF": "CS-ACTF",
+    "CF-ACTF": "CF-ACTF",
+    "T_actividades_abiertas": "ACTIVIDADES_ABIERTAS",
+}
+RECURSOS = ["links_clases", "links", "archivos", "labels", "pags", "libros"]
+ACTIVIDADES = ["tareas", "quiz", "glosario", "taller", "leccion", "foro", "wiki", "chat", "mapaMental"]
+TIPOS_APROBACION = ["APROBACION REGULAR", "APROBACION TUTORIA"]
+# Columnas numéricas que vienen de los contadores del reporte de cada curso
+CONTADORES = [
+    column for column in COURSE_FIELDS.values() if column not in ("NOMBRE", "OFG")
+] + ["Total_Docentes"]
+# Orden de las columnas del reporte, después de las categorías del LMS
+COLUMNAS_REPORTE = [
+    "PROFESOR NOMBRE",
+    "PROFESOR CEDULA",
+    "NOMBRE",
+    "OFG",
+    "CANT_ESTUDIANTES",
+    "secciones",
+    *RECURSOS,
+    "TOTAL_RECURSOS",
+    "ESTADO_RECURSOS",
+    *ACTIVIDADES,
+    "CP1-ACT",
+    "CP1-ACTF",
+    "CP2-ACT",
+    "CP2-ACTF",
+    "CP3-ACT",
+    "CP3-ACTF",
+    "CS-ACTF",
+    "CF-ACTF",
+    "TOTAL_ACTIVIDADES",
+    "ESTADO_ACTIVIDADES",
+    "ACTIVIDADES_ABIERTAS",
+]
+
+
+def classify_totals(totals: pd.Series, threshold: int) -> np.ndarray:
+    """
+    SUFICIENTE desde el umbral del corte, INSUFICIENTE hasta 3 por debajo y
+    DEFICIENTE el resto, para toda la columna a la vez.
+    """
+    return np.select(
+        [totals >= threshold, totals >= threshold - 3],
+        ["SUFICIENTE", "INSUFICIENTE"],
+        default="DEFICIENTE",
+    )
+
+
+def _counter_column(values: tuple) -> np.ndarray | pd.Series:
+    try:
+        return np.fromiter(values, dtype=np.int64, count=len(values))
+    except (TypeError, ValueError):
+        # Algún valor no entero: los inválidos quedan nulos y el curso va a CON PROBLEMAS
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+
+
+def _build_columnar(
+    rep_content: Iterable[dict], category_builder: CategoryBuilder, params: dict, parcial_cut: int
+) -> tuple[pd.DataFrame, list[str], list[str]]:
+    courses_withProblems = []
+    failed_withoutTeacher = []
+    categories = None
+    records = []
+    fields = ["Total_Docentes", "Docentes", *COURSE_FIELDS]
+    get_fields = itemgetter(*fields)
+    # Por curso solo se extraen los valores del reporte; los cálculos van por columnas
+    for course in rep_content:
+        try:
+            course_categories = category_builder.build_categories(course)
+            records.append((*course_categories.values(), *get_fields(course)))
+            categories = categories or list(course_categories)
+        except Exception as e:
+            logger.error(f"Error al procesar el curso {course.get('course_name')}: {e}")
+            courses_withProblems.append(course.get("course_name"))
+            if course.get("Total_Docentes") == 0:
+                failed_withoutTeacher.append(course.get("course_name"))
+    if not records:
+        return pd.DataFrame(), failed_withoutTeacher, courses_withProblems
+
+    names = [*categories, "Total_Docentes", "Docentes", *COURSE_FIELDS.values()]
+    df = pd.DataFrame(
+        {
+            name: _counter_column(values) if name in CONTADORES else np.array(values, dtype=object)
+            for name, values in zip(names, zip(*records))
+        }
+    )
+    del records
+    without_teacher = df["Total_Docentes"] == 0
+    courses_withoutTeacher = df.loc[without_teacher, "NOMBRE"].tolist() + failed_withoutTeacher
+
+    # Primer docente de la lista "nombre:cédula,nombre:cédula"
+    profesor = df["Docentes"].str.extract(r"^([^,:]*):([^,:]*)")
+    df["PROFESOR NOMBRE"] = profesor[0].mask(without_teacher, "SIN PROFESOR")
+    df["PROFESOR CEDULA"] = profesor[1].mask(without_teacher, "SIN PROFESOR")
+    df["OFG"] = pd.to_numeric(df["OFG"], errors="coerce")
+
+    invalid = (
+        df[CONTADORES].isna().any(axis=1)
+        | df["OFG"].isna()
+        | (df["OFG"] % 1 != 0)
+        | df["PROFESOR NOMBRE"].isna()
+        | df["PROFESOR CEDULA"].isna()
+    )
+    if invalid.any():
+        for course_name in df.loc[invalid, "NOMBRE"]:
+            logger.error(f"Error al procesar el curso {course_name}: docente, OFG o contadores inválidos")
+        courses_withProblems.extend(df.loc[invalid, "NOMBRE"].tolist())
+    df = df[~invalid & df["TIPO APROBACION"].isin(TIPOS_APROBACION)].astype(
+        {column: "int64" for column in ["OFG", *CONTADORES]}
+    )
+
+    df["TOTAL_RECURSOS"] = df[RECURSOS].sum(axis=1)
+    df["ESTADO_RECURSOS"] = classify_totals(
+        df["TOTAL_RECURSOS"], params[f"resources-cort-{parcial_cut}"]
+    )
+    df["TOTAL_ACTIVIDADES"] = df[ACTIVIDADES].sum(axis=1)
+    df["ESTADO_ACTIVIDADES"] = classify_totals(
+        df["TOTAL_ACTIVIDADES"], params[f"activity-cort-{parcial_cut}"]
+    )
+    return (
+        df[categories + COLUMNAS_REPORTE].reset_index(drop=True),
+        courses_withoutTeacher,
+        courses_withProblems,
+    )
 
 
-def make_report(excel_rep: list, filename: str = None):
+COLUMNAS_RECURSOS = [
+    "PROFESOR NOMBRE",
+    "PROFESOR CEDULA",
+    "NOMBRE",
+    "OFG",
+    "CANT_ESTUDIANTES",
+    "links_clases",
+    "links",
+    "archivos",
+    "labels",
+    "pags",
+    "libros",
+    "TOTAL_RECURSOS",
+    "ESTADO_RECURSOS",
+]
+
+COLUMNAS_ACTIVIDADES = [
+    "PROFESOR NOMBRE",
+    "PROFESOR CEDULA",
+    "NOMBRE",
+    "OFG",
+    "CANT_ESTUDIANTES",
+    "tareas",
+    "quiz",
+    "glosario",
+    "taller",
+    "leccion",
+    "foro",
+    "wiki",
+    "chat",
+    "mapaMental",
+    "TOTAL_ACTIVIDADES",
+    "ESTADO_ACTIVIDADES",
+    "ACTIVIDADES_ABIERTAS",
+]
+
+# Esquema estable del reporte Parquet; las columnas de categorías de cada LMS
+# (CARRERA, FACULTAD, TIPO APROBACION...) se agregan después como texto
+QUANTITATIVE_SCHEMA = {
+    "PROFESOR NOMBRE": "string",
+    "PROFESOR CEDULA": "string",
+    "NOMBRE": "string",
+    "OFG": "Int64",
+    "CANT_ESTUDIANTES": "Int64",
+    "secciones": "Int64",
+    "links_clases": "Int64",
+    "links": "Int64",
+    "archivos": "Int64",
+    "labels": "Int64",
+    "pags": "Int64",
+    "libros": "Int64",
+    "TOTAL_RECURSOS": "Int64",
+    "ESTADO_RECURSOS": "string",
+    "tareas": "Int64",
+    "quiz": "Int64",
+    "glosario": "Int64",
+    "taller": "Int64",
+    "leccion": "Int64",
+    "foro": "Int64",
+    "wiki": "Int64",
+    "chat": "Int64",
+    "mapaMental": "Int64",
+    "CP1-ACT": "Int64",
+    "CP1-ACTF": "Int64",
+    "CP2-ACT": "Int64",
+    "CP2-ACTF": "Int64",
+    "CP3-ACT": "Int64",
+    "CP3-ACTF": "Int64",
+    "CS-ACTF": "Int64",
+    "CF-ACTF": "Int64",
+    "TOTAL_ACTIVIDADES": "Int64",
+    "ESTADO_ACTIVIDADES": "string",
+    "ACTIVIDADES_ABIERTAS": "Int64",
+}
+
+# Orden de los estados en las hojas de recursos y actividades
+ORDEN_ESTADOS = ["DEFICIENTE", "INSUFICIENTE", "SUFICIENTE"]
+
+# Colores para los diferentes estados
+ESTADO_COLORS = {
+    "SUFICIENTE": "C6EFCE",  # Verde claro
+    "INSUFICIENTE": "FFEB9C",  # Amarillo claro
+    "DEFICIENTE": "FFC7CE",  # Rojo claro
+}
+
+HEADER_COLOR = "366092"
+
+# Columnas de estado y su etiqueta en las hojas de resumen
+STATUS_LABELS = {
+    "ESTADO_RECURSOS": "Recursos",
+    "ESTADO_ACTIVIDADES": "Actividades",
+}
+
+# Hojas de resumen: nombre -> columnas de agrupación. Agregar una hoja (p. ej.
+# ["PERIODO"], ["FACULTAD", "CARRERA"] o ["PROFESOR CEDULA"]) no agrega pasadas
+SUMMARY_SHEETS = {
+    "Resumen por Carrera": ["CARRERA"],
+    "Resumen por Facultad": ["FACULTAD"],
+}
+
+
+def make_report(
+    excel_rep: list | pd.DataFrame,
+    filename: str = None,
+    engine: str | None = None,
+    metadata: dict | None = None,
+):
     """
-    Crea un archivo Excel con múltiples hojas a partir de los datos del reporte cuantitativo.
+    Crea un archivo Excel con múltiples hojas a partir de los datos del reporte
+    cuantitativo y, según settings.REPORT_FORMATS, su versión Parquet.
 
     Args:
-        excel_rep (list): Lista de diccionarios con los datos del reporte
+        excel_rep (list | DataFrame): Filas del reporte (el motor "pandas" entrega el DataFrame)
         filename (str, optional): Nombre del archivo. Si no se especifica, se genera automáticamente.
+        engine (str, optional): "xlsxwriter" u "openpyxl" (por defecto settings.EXCEL_ENGINE)
+        metadata (dict, optional): Columnas constantes del Parquet (p. ej. LMS y CORTE)
 
     Returns:
-        str: Ruta del archivo Excel creado
+        str: Ruta del archivo Excel creado (o del Parquet si no se genera Excel)
     """
-    if not excel_rep:
+    if len(excel_rep) == 0:
         logger.warning("No hay datos para generar el reporte")
         return None
 
     # Crear DataFrame principal con todos los datos
-    df_completo = pd.DataFrame(excel_rep)
+    df_completo = excel_rep if isinstance(excel_rep, pd.DataFrame) else pd.DataFrame(excel_rep)
 
     # Generar nombre del archivo si no se especifica
     if filename is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"reporte_cuantitativo_{timestamp}.xlsx"
 
+    parquet_path = None
+    if "parquet" in settings.REPORT_FORMATS:
+        # Solo los datos completos: las demás hojas se derivan de ellos
+        parquet_path = write_parquet(df_completo, filename, QUANTITATIVE_SCHEMA, metadata=metadata)
+    if "xlsx" not in settings.REPORT_FORMATS:
+        return parquet_path
+
     logger.info(f"Generando archivo Excel: {filename}")
 
-    # Crear archivo Excel con múltiples hojas
-    with pd.ExcelWriter(filename, engine="openpyxl") as writer:
+    # Hoja 1: Datos Completos, hojas 2 y 3: recursos y actividades, luego los resúmenes
+    sheets = {
+        "Datos Completos": df_completo,
+        "Reporte Recursos": _state_sheet(df_completo, COLUMNAS_RECURSOS, "ESTADO_RECURSOS"),
+        "Reporte Actividades": _state_sheet(df_completo, COLUMNAS_ACTIVIDADES, "ESTADO_ACTIVIDADES"),
+    } | build_summary_sheets(df_completo)
+
+    engine = engine or settings.EXCEL_ENGINE
+    if engine == "xlsxwriter" and xlsxwriter is None:
+        logger.warning("xlsxwriter no está instalado, se usa openpyxl")
+        engine = "openpyxl"
+    if engine == "xlsxwriter":
+        _write_xlsxwriter(filename, sheets)
+    else:
+        _write_openpyxl(filename, sheets)
 
-        # Hoja 1: Datos Completos
-        df_completo.to_excel(writer, sheet_name="Datos Completos", index=False)
-        logger.info("Hoja 'Datos Completos' creada")
-
-        # Hoja 2: Reporte de Recursos
-        columnas_recursos = [
-            "PROFESOR NOMBRE",
-            "PROFESOR CEDULA",
-            "NOMBRE",
-            "OFG",
-            "CANT_ESTUDIANTES",
-            "links_clases",
-            "links",
-            "archivos",
-            "labels",
-            "pags",
-            "libros",
-            "TOTAL_RECURSOS",
-            "ESTADO_RECURSOS",
-        ]
-
-        # Filtrar solo las columnas que existen en los datos
-        columnas_recursos_existentes = [
-            col for col in columnas_recursos if col in df_completo.columns
-        ]
-        df_recursos = df_completo[columnas_recursos_existentes].copy()
-
-        # Ordenar por estado de recursos (primero DEFICIENTE, luego INSUFICIENTE, luego SUFICIENTE)
-        order_recursos = ["DEFICIENTE", "INSUFICIENTE", "SUFICIENTE"]
-        if "ESTADO_RECURSOS" in df_recursos.columns:
-            df_recursos["_sort_order"] = df_recursos["ESTADO_RECURSOS"].map(
-                {estado: i for i, estado in enumerate(order_recursos)}
-            )
-            df_recursos = df_recursos.sort_values("_sort_order").drop(
-                "_sort_order", axis=1
-            )
+    logger.info(f"Archivo Excel generado exitosamente: {filename}")
+    return filename
 
-        df_recursos.to_excel(writer, sheet_name="Reporte Recursos", index=False)
-        logger.info("Hoja 'Reporte Recursos' creada")
-
-        # Hoja 3: Reporte de Actividades
-        columnas_actividades = [
-            "PROFESOR NOMBRE",
-            "PROFESOR CEDULA",
-            "NOMBRE",
-            "OFG",
-            "CANT_ESTUDIANTES",
-            "tareas",
-            "quiz",
-            "glosario",
-            "taller",
-            "leccion",
-            "foro",
-            "wiki",
-            "chat",
-            "mapaMental",
-            "TOTAL_ACTIVIDADES",
-            "ESTADO_ACTIVIDADES",
-            "ACTIVIDADES_ABIERTAS",
-        ]
-
-        # Filtrar solo las columnas que existen en los datos
-        columnas_actividades_existentes = [
-            col for col in columnas_actividades if col in df_completo.columns
-        ]
-        df_actividades = df_completo[columnas_actividades_existentes].copy()
-
-        # Ordenar por estado de actividades (primero DEFICIENTE, luego INSUFICIENTE, luego SUFICIENTE)
-        order_actividades = ["DEFICIENTE", "INSUFICIENTE", "SUFICIENTE"]
-        if "ESTADO_ACTIVIDADES" in df_actividades.columns:
-            df_actividades["_sort_order"] = df_actividades["ESTADO_ACTIVIDADES"].map(
-                {estado: i for i, estado in enumerate(order_actividades)}
-            )
-            df_actividades = df_actividades.sort_values("_sort_order").drop(
-                "_sort_order", axis=1
-            )
 
-        df_actividades.to_excel(writer, sheet_name="Reporte Actividades", index=False)
-        logger.info("Hoja 'Reporte Actividades' creada")
+def _state_sheet(df_completo, columnas, estado_col):
+    """
+    Hoja de recursos o actividades: solo las columnas que existen en los datos,
+    ordenada por estado (primero DEFICIENTE, luego INSUFICIENTE, luego SUFICIENTE).
+    """
+    df = df_completo[[col for col in columnas if col in df_completo.columns]].copy()
+    if estado_col in df.columns:
+        df["_sort_order"] = df[estado_col].map(
+            {estado: i for i, estado in enumerate(ORDEN_ESTADOS)}
+        )
+        df = df.sort_values("_sort_order").drop("_sort_order", axis=1)
+    return df
 
-        # Crear hojas de resumen por carrera y facultad
-        create_summary_sheets(writer, df_completo)
 
-        # Formatear las hojas para mejor presentación
-        _format_excel_sheets(writer, df_completo, df_recursos, df_actividades)
+def _state_column(sheet_name, df):
+    """
+    Columna de estado que colorea las filas de la hoja, si corresponde.
+    """
+    if sheet_name == "Reporte Recursos" and "ESTADO_RECURSOS" in df.columns:
+        return "ESTADO_RECURSOS"
+    if sheet_name == "Reporte Actividades" and "ESTADO_ACTIVIDADES" in df.columns:
+        return "ESTADO_ACTIVIDADES"
+    return None
 
-    logger.info(f"Archivo Excel generado exitosamente: {filename}")
-    return filename
 
+def _write_xlsxwriter(filename, sheets):
+    """
+    Escribe el reporte con xlsxwriter en modo constant_memory: cada fila se
+    escribe una sola vez con su formato, los colores por estado son formatos
+    condicionales sobre el rango y los anchos se calculan del DataFrame.
+    """
+    workbook = xlsxwriter.Workbook(filename, {"constant_memory": True})
+    try:
+        header_format = workbook.add_format(
+            {
+                "bold": True,
+                "font_color": "#FFFFFF",
+                "bg_color": f"#{HEADER_COLOR}",
+                "align": "center",
+                "valign": "vcenter",
+            }
+        )
+        state_formats = {
+            estado: workbook.add_format({"bg_color": f"#{color}"})
+            for estado, color in ESTADO_COLORS.items()
+        }
+        for sheet_name, df in sheets.items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            for col_num, width in enumerate(plan_column_widths(df)):
+                worksheet.set_column(col_num, col_num, width)
+            worksheet.write_row(0, 0, list(df.columns), header_format)
+            values = df.astype(object).where(df.notna(), None)
+            for row_num, row in enumerate(values.itertuples(index=False, name=None), 1):
+                worksheet.write_row(row_num, 0, row)
+            logger.info(f"Hoja '{sheet_name}' creada")
+
+            if len(df) == 0:
+                continue
+            last_row, last_col = len(df), len(df.columns) - 1
+            worksheet.autofilter(0, 0, last_row, last_col)
+            logger.info(f"Filtros aplicados a la hoja '{sheet_name}'")
+
+            estado_col = _state_column(sheet_name, df)
+            if estado_col:
+                # Aplicar color a toda la fila según su estado
+                estado_letter = xl_col_to_name(df.columns.get_loc(estado_col))
+                for estado, state_format in state_formats.items():
+                    worksheet.conditional_format(
+                        1,
+                        0,
+                        last_row,
+                        last_col,
+                        {
+                            "type": "formula",
+                            "criteria": f'=${estado_letter}2="{estado}"',
+                            "format": state_format,
+                        },
+                    )
+    finally:
+        workbook.close()
+
+
+def _write_openpyxl(filename, sheets):
+    with pd.ExcelWriter(filename, engine="openpyxl") as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            logger.info(f"Hoja '{sheet_name}' creada")
 
-def create_summary_sheets(writer, df_completo):
+        # Formatear las hojas para mejor presentación
+        _format_excel_sheets(writer, sheets)
+
+
+def build_summary_sheets(df_completo, groupings: dict[str, list[str]] | None = None) -> dict:
     """
-    Crea hojas de resumen agrupadas por carrera y facultad.
+    Crea las hojas de resumen por estado de recursos y actividades.
 
     Args:
-        writer: ExcelWriter object
         df_completo: DataFrame con todos los datos
+        groupings: Nombre de la hoja -> columnas por las que agrupar
+            (por defecto SUMMARY_SHEETS: carrera y facultad)
+
+    Returns:
+        dict: Nombre de la hoja -> DataFrame del resumen
     """
+    groupings = groupings or SUMMARY_SHEETS
     # Verificar que existen las columnas necesarias
-    required_cols = ["CARRERA", "FACULTAD", "ESTADO_RECURSOS", "ESTADO_ACTIVIDADES"]
-    missing_cols = [col for col in required_cols if col not in df_completo.columns]
-
+    missing_cols = [col for col in STATUS_LABELS if col not in df_completo.columns]
     if missing_cols:
         logger.warning(
             f"No se pueden crear hojas de resumen. Columnas faltantes: {missing_cols}"
         )
-        return
-
-    # Resumen por Carrera
-    logger.info("Creando hoja de resumen por carrera")
-    summary_carrera = _create_groupby_summary(df_completo, "CARRERA")
-    summary_carrera.to_excel(writer, sheet_name="Resumen por Carrera", index=False)
+        return {}
+
+    available = {}
+    for sheet_name, group_columns in groupings.items():
+        missing_cols = [col for col in group_columns if col not in df_completo.columns]
+        if missing_cols:
+            logger.warning(
+                f"No se puede crear la hoja '{sheet_name}'. Columnas faltantes: {missing_cols}"
+            )
+            continue
+        available[sheet_name] = group_columns
+    if not available:
+        return {}
 
-    # Resumen por Facultad
-    logger.info("Creando hoja de resumen por facultad")
-    summary_facultad = _create_groupby_summary(df_completo, "FACULTAD")
-    summary_facultad.to_excel(writer, sheet_name="Resumen por Facultad", index=False)
+    logger.info(f"Creando hojas de resumen: {', '.join(available)}")
+    return summarize_by_groups(df_completo, available)
 
 
-def _create_groupby_summary(df, group_column):
+def summarize_by_groups(df, groupings: dict[str, list[str]]) -> dict:
     """
-    Crea un resumen agrupado por la columna especificada.
+    Resume los estados de recursos y actividades para varias agrupaciones con
+    una sola pasada sobre los datos: se cuentan los estados al nivel más fino
+    (la unión de todas las columnas de agrupación) con un único
+    groupby().value_counts().unstack(), y cada resumen se obtiene sumando esa
+    tabla de conteos, que es mucho más pequeña que los datos.
 
     Args:
         df: DataFrame con los datos
-        group_column: Columna por la cual agrupar ('CARRERA' o 'FACULTAD')
+        groupings: Nombre del resumen -> columnas por las que agrupar
 
     Returns:
-        DataFrame con el resumen
+        dict: Nombre del resumen -> DataFrame con el formato de las hojas de resumen
     """
-    # Crear tablas pivot para recursos y actividades
-    recursos_pivot = pd.crosstab(df[group_column], df["ESTADO_RECURSOS"])
-    actividades_pivot = pd.crosstab(df[group_column], df["ESTADO_ACTIVIDADES"])
-
-    # Asegurar que todas las columnas de estado existen
-    estados = ["DEFICIENTE", "INSUFICIENTE", "SUFICIENTE"]
-    for estado in estados:
-        if estado not in recursos_pivot.columns:
-            recursos_pivot[estado] = 0
-        if estado not in actividades_pivot.columns:
-            actividades_pivot[estado] = 0
-
-    # Reordenar columnas
-    recursos_pivot = recursos_pivot[estados]
-    actividades_pivot = actividades_pivot[estados]
-
-    # Crear DataFrame de resumen
-    summary_data = []
-
-    for group_name in recursos_pivot.index:
-        row = {
-            group_column: group_name,
-            "Total Cursos": recursos_pivot.loc[group_name].sum(),
-            # Recursos
-            "Recursos DEFICIENTE": recursos_pivot.loc[group_name, "DEFICIENTE"],
-            "Recursos INSUFICIENTE": recursos_pivot.loc[group_name, "INSUFICIENTE"],
-            "Recursos SUFICIENTE": recursos_pivot.loc[group_name, "SUFICIENTE"],
-            # Actividades
-            "Actividades DEFICIENTE": (
-                actividades_pivot.loc[group_name, "DEFICIENTE"]
-                if group_name in actividades_pivot.index
-                else 0
-            ),
-            "Actividades INSUFICIENTE": (
-                actividades_pivot.loc[group_name, "INSUFICIENTE"]
-                if group_name in actividades_pivot.index
-                else 0
-            ),
-            "Actividades SUFICIENTE": (
-                actividades_pivot.loc[group_name, "SUFICIENTE"]
-                if group_name in actividades_pivot.index
-                else 0
-            ),
-        }
-
-        # Calcular porcentajes
-        total_cursos = row["Total Cursos"]
-        if total_cursos > 0:
-            row["% Recursos DEFICIENTE"] = round(
-                (row["Recursos DEFICIENTE"] / total_cursos) * 100, 1
-            )
-            row["% Recursos INSUFICIENTE"] = round(
-                (row["Recursos INSUFICIENTE"] / total_cursos) * 100, 1
-            )
-            row["% Recursos SUFICIENTE"] = round(
-                (row["Recursos SUFICIENTE"] / total_cursos) * 100, 1
-            )
-            row["% Actividades DEFICIENTE"] = round(
-                (row["Actividades DEFICIENTE"] / total_cursos) * 100, 1
-            )
-            row["% Actividades INSUFICIENTE"] = round(
-                (row["Actividades INSUFICIENTE"] / total_cursos) * 100, 1
-            )
-            row["% Actividades SUFICIENTE"] = round(
-                (row["Actividades SUFICIENTE"] / total_cursos) * 100, 1
-            )
-        else:
-            for key in row.keys():
-                if key.startswith("%"):
-                    row[key] = 0.0
+    group_columns = list(dict.fromkeys(col for columns in groupings.values() for col in columns))
+    estados = df[group_columns + list(STATUS_LABELS)].melt(
+        id_vars=group_columns, var_name="tipo", value_name="estado"
+    )
+    counts = (
+        estados.groupby(group_columns + ["tipo"], dropna=False)["estado"]
+        .value_counts()
+        .unstack(["tipo", "estado"], fill_value=0)
+    )
+    return {
+        name: _format_group_summary(counts.groupby(level=columns).sum())
+        for name, columns in groupings.items()
+    }
 
-        summary_data.append(row)
 
-    summary_df = pd.DataFrame(summary_data)
+def _format_group_summary(counts):
+    """
+    Convierte una tabla de conteos (grupo x (tipo, estado)) en un resumen con
+    el total de cursos, los conteos por estado y sus porcentajes.
+    """
+    def status_counts(status_col):
+        if status_col in counts.columns.get_level_values("tipo"):
+            return counts[status_col]
+        return pd.DataFrame(0, index=counts.index, columns=ORDEN_ESTADOS)
+
+    # El total cuenta todos los cursos con estado de recursos, como la tabla cruzada original
+    total = status_counts("ESTADO_RECURSOS").sum(axis=1)
+    columns = {"Total Cursos": total}
+    percentages = {}
+    for status_col, label in STATUS_LABELS.items():
+        status = status_counts(status_col).reindex(columns=ORDEN_ESTADOS, fill_value=0)
+        status_pct = status.div(total.where(total > 0), axis=0).mul(100).round(1).fillna(0.0)
+        for estado in ORDEN_ESTADOS:
+            columns[f"{label} {estado}"] = status[estado]
+            percentages[f"% {label} {estado}"] = status_pct[estado]
+
+    summary = pd.DataFrame(columns | percentages)
+    summary = summary[summary["Total Cursos"] > 0].reset_index()
 
     # Ordenar por total de cursos (descendente)
-    summary_df = summary_df.sort_values("Total Cursos", ascending=False)
-
-    return summary_df
+    return summary.sort_values("Total Cursos", ascending=False)
 
 
-def _format_excel_sheets(writer, df_completo, df_recursos, df_actividades):
+def _format_excel_sheets(writer, sheets):
     """
     Aplica formato a las hojas del Excel para mejorar la presentación.
 
     Args:
         writer: ExcelWriter object
-        df_completo: DataFrame con datos completos
-        df_recursos: DataFrame con datos de recursos
-        df_actividades: DataFrame con datos de actividades
+        sheets: Nombre de la hoja -> DataFrame escrito en ella
     """
     from openpyxl.styles import PatternFill, Font, Alignment
     from openpyxl.utils import get_column_letter
 
-    # Colores para los diferentes estados
-    colors = {
-        "SUFICIENTE": "C6EFCE",  # Verde claro
-        "INSUFICIENTE": "FFEB9C",  # Amarillo claro
-        "DEFICIENTE": "FFC7CE",  # Rojo claro
-    }
-
     # Obtener todas las hojas del workbook
     all_sheets = list(writer.sheets.keys())
 
@@ -414,13 +730,8 @@ def _format_excel_sheets(writer, df_completo, df_recursos, df_actividades):
         worksheet = writer.sheets[sheet_name]
 
         # Obtener el DataFrame correspondiente
-        if sheet_name == "Datos Completos":
-            df = df_completo
-        elif sheet_name == "Reporte Recursos":
-            df = df_recursos
-        elif sheet_name == "Reporte Actividades":
-            df = df_actividades
-        else:
+        df = sheets[sheet_name]
+        if sheet_name not in ["Datos Completos", "Reporte Recursos", "Reporte Actividades"]:
             # Para hojas de resumen, obtener el rango de datos
             max_row = worksheet.max_row
             max_col = worksheet.max_column
@@ -431,7 +742,7 @@ def _format_excel_sheets(writer, df_completo, df_recursos, df_actividades):
                 logger.info(f"Filtros aplicados a la hoja '{sheet_name}'")
 
             # Formatear encabezados para hojas de resumen
-            _format_summary_headers(worksheet, max_col)
+            _format_summary_headers(worksheet, df)
             continue
 
         # Formatear encabezados para hojas principales
@@ -454,20 +765,8 @@ def _format_excel_sheets(writer, df_completo, df_recursos, df_actividades):
             worksheet.auto_filter.ref = f"A1:{last_col}{last_row}"
             logger.info(f"Filtros aplicados a la hoja '{sheet_name}'")
 
-        # Ajustar ancho de columnas
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-
-            adjusted_width = min(max_length + 2, 50)  # Máximo 50 caracteres
-            worksheet.column_dimensions[column_letter].width = adjusted_width
+        # Ajustar ancho de columnas a partir de los datos
+        apply_openpyxl_widths(worksheet, df)
 
         # Aplicar colores según el estado (solo para hojas de recursos y actividades)
         if sheet_name in ["Reporte Recursos", "Reporte Actividades"]:
@@ -486,10 +785,10 @@ def _format_excel_sheets(writer, df_completo, df_recursos, df_actividades):
                     estado_cell = worksheet.cell(row=row_num, column=estado_col_index)
                     estado_value = estado_cell.value
 
-                    if estado_value in colors:
+                    if estado_value in ESTADO_COLORS:
                         fill = PatternFill(
-                            start_color=colors[estado_value],
-                            end_color=colors[estado_value],
+                            start_color=ESTADO_COLORS[estado_value],
+                            end_color=ESTADO_COLORS[estado_value],
                             fill_type="solid",
                         )
 
@@ -498,16 +797,15 @@ def _format_excel_sheets(writer, df_completo, df_recursos, df_actividades):
                             worksheet.cell(row=row_num, column=col_num).fill = fill
 
 
-def _format_summary_headers(worksheet, max_col):
+def _format_summary_headers(worksheet, df):
     """
     Formatea los encabezados de las hojas de resumen.
 
     Args:
         worksheet: Hoja de trabajo de openpyxl
-        max_col: Número máximo de columnas
+        df: DataFrame del resumen escrito en la hoja
     """
     from openpyxl.styles import PatternFill, Font, Alignment
-    from openpyxl.utils import get_column_letter
 
     header_font = Font(bold=True, color="FFFFFF")
     header_fill = PatternFill(
@@ -516,24 +814,11 @@ def _format_summary_headers(worksheet, max_col):
     header_alignment = Alignment(horizontal="center", vertical="center")
 
     # Aplicar formato a la primera fila (encabezados)
-    for col_num in range(1, max_col + 1):
+    for col_num in range(1, len(df.columns) + 1):
         cell = worksheet.cell(row=1, column=col_num)
         cell.font = header_font
         cell.fill = header_fill
         cell.alignment = header_alignment
 
-    # Ajustar ancho de columnas
-    for col_num in range(1, max_col + 1):
-        column_letter = get_column_letter(col_num)
-        max_length = 0
-
-        for row in worksheet.iter_rows(min_col=col_num, max_col=col_num):
-            for cell in row:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-
-        adjusted_width = min(max_length + 2, 50)
-        worksheet.column_dimensions[column_letter].width = adjusted_width
+    # Ajustar ancho de columnas a partir de los datos
+    apply_openpyxl_widths(worksheet, df)
@@ -40,6 +40,10 @@ ACTIVITY_TYPES = [
     "chat",
     "mindmap",
 ]
+# Lista de Redis donde cada elemento es el reporte de un curso junto con sus
+# module_indexes y la clave del curso (course), que identifica los repetidos
+COURSE_REPORTS_LIST = "course_reports"
+
 TEMPLATE_NAME = "Indicar breve descripción del contenido a evaluar"
 TEMPLATES_CODES = {"CP1", "CP2", "CP3", "CS", "CF"}
 
@@ -49,8 +53,8 @@ def build_initial_data(course_info: dict, course_name: str, ofg_pos: int):
         "course_name": course_name,
         "id_curso": course_info["id"],
         "Total_Secciones": len(course_info["sections"]),
-        "Total_Estudiantes": len(course_info["students"]),
-        "Total_Docentes": len(course_info["teachers"]),
+        "Total_Estudiantes": course_info["students_count"],
+        "Total_Docentes": course_info["teachers_count"],
         "Docentes": (
             ",".join(
                 [f"{teacher['fullname']}:{teacher['username']}" for teacher in course_info["teachers"]]
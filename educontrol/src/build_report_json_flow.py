@@ -1,41 +1,137 @@
-import json
+import os
+from itertools import batched
+from src.settings import settings
 from src.extract_data_flow import process_data
 from src.utils.redis_client import RedisClient
-from src.build_report_json import build_course_report
+from src.utils.codecs import encode_value
+from src.utils.run_manifest import RunManifest, BUILT
+from src.build_report_json import build_course_report, COURSE_REPORTS_LIST
 
 from src.utils.logging.logger_factory import get_logger
 
 logger = get_logger()
 
-def main_build_report(periods: list[str], ofg_pos: int):
-    redis_client = RedisClient()
+def main_build_report(
+    periods: list[str],
+    ofg_pos: int,
+    lms: str | None = None,
+    manifest: RunManifest | None = None,
+    namespace: str = "",
+):
+    redis_client = RedisClient(namespace)
     for period in periods:
-        build_report_json_flow_init(redis_client, period, ofg_pos)
+        build_report_json_flow_init(redis_client, period, ofg_pos, lms, manifest)
 
-def build_report_json_flow_init(redis_client: RedisClient, period: str, ofg_pos: int):
+def build_report_json_flow_init(
+    redis_client: RedisClient,
+    period: str,
+    ofg_pos: int,
+    lms: str | None = None,
+    manifest: RunManifest | None = None,
+):
     logger.info(f"Building report json for period {period}")
-    all_courses = redis_client.get_hset_keys_with_prefix(f"{period}:")
-    logger.info(f"Found {len(all_courses)} courses for period {period}")
-    redis_client.client.rpush("total_report_json", json.dumps([]))
-    redis_client.client.rpush("module_indexes", json.dumps({}))
-    
-    process_data(all_courses, 10, build_report_json_flow, redis_client, period, ofg_pos)
-    
+    built = manifest.done(lms, period, BUILT) if manifest else set()
+    if built:
+        logger.info(f"{len(built)} courses already built in this run")
+    backend = settings.REPORT_BUILD_BACKEND
+    workers = settings.REPORT_BUILD_WORKERS or ((os.cpu_count() or 1) if backend == "processes" else 10)
 
+    def mark_built(built_keys: list[str]) -> int:
+        if manifest:
+            for course_key in built_keys:
+                manifest.mark_done(lms, period, BUILT, course_key)
+        return len(built_keys)
 
-def build_report_json_flow(chunk: list[str], redis_client: RedisClient, period: str, ofg_pos: int):
+    # Una sola planificación por periodo: las claves llegan de SCAN de forma
+    # perezosa, así no hay barrera entre páginas. Los chunks se dimensionan para
+    # que una página de SCAN alcance para todos los workers.
+    pending = (
+        course_key
+        for course_key in redis_client.iter_keys(redis_client.key(period) + ":")
+        if course_key not in built
+    )
+    chunk_size = max(1, min(settings.REDIS_PIPELINE_BATCH, settings.REDIS_SCAN_COUNT // workers))
+    if backend == "processes":
+        # Cada proceso abre su propia conexión y devuelve solo las claves construidas
+        total_processed = process_data(
+            pending, workers, build_report_json_worker, redis_client.namespace, period, ofg_pos,
+            chunk_size=chunk_size, backend=backend, on_result=mark_built,
+        )
+    else:
+        total_processed = process_data(
+            pending, workers, build_report_json_flow, redis_client, period, ofg_pos, lms, manifest,
+            chunk_size=chunk_size,
+        )
+    logger.info(f"Built {total_processed} course reports for period {period}")
+
+
+def build_report_json_worker(
+    chunk: list[str],
+    namespace: str,
+    period: str,
+    ofg_pos: int,
+) -> list[str]:
+    """
+    Punto de entrada de los procesos de construcción: recibe solo datos
+    serializables y devuelve las claves de los cursos construidos.
+    """
+    redis_client = RedisClient(namespace)
+    return [
+        course_key
+        for built_keys in build_report_json_batches(chunk, redis_client, period, ofg_pos)
+        for course_key in built_keys
+    ]
+
+
+def build_report_json_flow(
+    chunk: list[str],
+    redis_client: RedisClient,
+    period: str,
+    ofg_pos: int,
+    lms: str | None = None,
+    manifest: RunManifest | None = None,
+):
     processed_courses = 0
-    for course_key in chunk:
-        try:
-            logger.info(f"Building report json for course {course_key}")
-            course_info = redis_client.get_hset(course_key)
-            course_name = course_key.split(":")[1]
-            course_data, module_indexes = build_course_report(course_info, course_name, ofg_pos)
-            redis_client.client.rpush("total_report_json", json.dumps(course_data))
-            redis_client.client.rpush("module_indexes", json.dumps(module_indexes))
-            logger.info(f"Report json for course {course_key} built")
-            processed_courses += 1
-        except Exception as e:
-            logger.error(f"Error building report json for course {course_key}: {e}")
-            continue
-    return processed_courses       
+    for built_keys in build_report_json_batches(chunk, redis_client, period, ofg_pos):
+        if manifest:
+            for course_key in built_keys:
+                manifest.mark_done(lms, period, BUILT, course_key)
+        processed_courses += len(built_keys)
+    return processed_courses
+
+
+def build_report_json_batches(
+    chunk: list[str],
+    redis_client: RedisClient,
+    period: str,
+    ofg_pos: int,
+):
+    """
+    Construye los reportes de un chunk por lotes y los agrega a la lista de
+    reportes; entrega las claves construidas de cada lote.
+    """
+    # Cada lote se lee con un solo pipeline y sus reportes se escriben con otro.
+    # Reporte y module_indexes van en un mismo registro, así no dependen de que
+    # dos listas separadas se mantengan alineadas entre hilos. El push y el
+    # BUILT del manifiesto (SQLite) no son atómicos: los cursos que se vuelvan a
+    # construir al retomar se descartan por su clave en get_courses_data.
+    for course_keys in batched(chunk, settings.REDIS_PIPELINE_BATCH):
+        records = []
+        built_keys = []
+        for course_key, course_info in zip(course_keys, redis_client.get_hsets(list(course_keys))):
+            try:
+                logger.info(f"Building report json for course {course_key}")
+                course_name = course_key.removeprefix(redis_client.key(period) + ":").split(":")[0]
+                course_data, module_indexes = build_course_report(course_info, course_name, ofg_pos)
+                records.append(
+                    encode_value(
+                        {"course": course_key, "report": course_data, "module_indexes": module_indexes}
+                    )
+                )
+                built_keys.append(course_key)
+                logger.info(f"Report json for course {course_key} built")
+            except Exception as e:
+                logger.error(f"Error building report json for course {course_key}: {e}")
+                continue
+        redis_client.push_lists({redis_client.key(COURSE_REPORTS_LIST): records})
+        yield built_keys
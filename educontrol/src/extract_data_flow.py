@@ -1,33 +1,57 @@
-from collections.abc import Callable
+import multiprocessing
+from collections.abc import Callable, Iterable
 from src.utils.moodle_client import MoodleClient
 from src.utils.redis_client import RedisClient
 from src.utils.parsers import extract_course_info
+from src.utils.course_state import CourseStateStore
+from src.utils.run_manifest import RunManifest, EXTRACTED
+from src.utils.throttle import Throttle, ThrottleConfig
 from src.utils.logging.logger_factory import get_logger
 from src.schemas import MoodleAPIConn
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import batched
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from typing import List, Dict, Any
-import math
 
 logger = get_logger()
 
 TEMPLATE = "PLANTILLA"
 
 
+def order_by_cost(
+    courses: List[Dict[Any, Any]], state_store: CourseStateStore | None, lms: str
+) -> List[Dict[Any, Any]]:
+    """
+    Ordena los cursos de mayor a menor costo según la ejecución anterior, para
+    que los más largos empiecen primero. Los cursos sin historial van al inicio.
+    Los costos se guardan en el CourseStateStore, que solo existe con
+    INCREMENTAL_EXTRACTION: sin extracción incremental (state_store=None) los
+    cursos se procesan en el orden en que llegan de Moodle.
+    """
+    if not state_store:
+        return courses
+    costs = state_store.costs(lms)
+    return sorted(courses, key=lambda course: costs.get(course["id"], float("inf")), reverse=True)
+
+
 def process_course(
     course: Dict[Any, Any],
     period: str,
     moodle_client: MoodleClient,
     redis_client: RedisClient,
+    state_store: CourseStateStore | None = None,
+    manifest: RunManifest | None = None,
 ) -> bool:
     """
     Procesa un curso individual extrayendo su información y guardándola en Redis.
 
     Args:
-        course: Diccionario con información del curso
+        course: Diccionario con los metadatos del curso (core_course_get_courses_by_field)
         period: Período académico
         moodle_client: Cliente de Moodle
         redis_client: Cliente de Redis
+        state_store: Estado de la última extracción (solo en modo incremental)
+        manifest: Registro de avance de la ejecución, para poder retomarla
 
     Returns:
         bool: True si el curso fue procesado exitosamente, False en caso contrario
@@ -38,11 +62,20 @@ def process_course(
     logger.info(f"Extrayendo información del curso {course['shortname']}")
 
     try:
-        if course_info := extract_course_info(course["id"], moodle_client):
+        course_info = state_store and state_store.get_unchanged(moodle_client.name, course)
+        if course_info:
+            logger.info(f"Curso {course['shortname']} sin cambios, se reutiliza la extracción anterior")
+        else:
+            course_info = extract_course_info(course["id"], moodle_client, course)
+            if course_info and state_store:
+                state_store.save(moodle_client.name, course, course_info)
+        if course_info:
             redis_client.save_hset(
-                f"{period}:{course['shortname']}:{datetime.now().strftime('%Y-%m-%d')}",
+                redis_client.key(period, course["shortname"], datetime.now().strftime("%Y-%m-%d")),
                 course_info,
             )
+            if manifest:
+                manifest.mark_done(moodle_client.name, period, EXTRACTED, course["id"])
             logger.info(f"Información del curso {course['shortname']} extraída")
             return True
     except Exception as e:
@@ -52,7 +85,12 @@ def process_course(
 
 
 def process_courses_chunk(
-    courses_chunk: List[Dict[Any, Any]], period: str, moodle_api_conn: MoodleAPIConn
+    courses_chunk: List[Dict[Any, Any]],
+    period: str,
+    moodle_client: MoodleClient,
+    state_store: CourseStateStore | None = None,
+    manifest: RunManifest | None = None,
+    namespace: str = "",
 ) -> int:
     """
     Procesa un chunk/lote de cursos.
@@ -60,50 +98,66 @@ def process_courses_chunk(
     Args:
         courses_chunk: Lista de cursos a procesar
         period: Período académico
-        moodle_api_conn: Configuración de conexión a Moodle
+        moodle_client: Cliente de Moodle compartido (un pool de conexiones por LMS)
+        state_store: Estado de la última extracción (solo en modo incremental)
+        manifest: Registro de avance de la ejecución, para poder retomarla
+        namespace: Namespace de Redis de la ejecución
 
     Returns:
         int: Número de cursos procesados exitosamente
     """
-    moodle_client = MoodleClient(moodle_api_conn.url, moodle_api_conn.token, moodle_api_conn.lmsName)
-    redis_client = RedisClient()
+    redis_client = RedisClient(namespace)
     return sum(
-        int(process_course(course, period, moodle_client, redis_client))
+        int(process_course(course, period, moodle_client, redis_client, state_store, manifest))
         for course in courses_chunk
     )
 
 
-def split_data_into_chunks(
-    data: List[Dict[Any, Any]], num_chunks: int
-) -> List[List[Dict[Any, Any]]]:
-    """
-    Divide la lista de cursos en chunks para procesamiento paralelo.
-
-    Args:
-        courses: Lista completa de cursos
-        num_chunks: Número de chunks deseados
-
-    Returns:
-        List[List]: Lista de chunks, cada uno conteniendo una porción de cursos
-    """
-    if not data:
-        return []
-
-    chunk_size = math.ceil(len(data) / num_chunks)
-    return [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
-
-
-def extract_courses_data_flow(moodle_api_conn: MoodleAPIConn, max_workers: int = 4):
+def extract_courses_data_flow(
+    moodle_api_conn: MoodleAPIConn,
+    max_workers: int | None = None,
+    incremental: bool = False,
+    manifest: RunManifest | None = None,
+    namespace: str = "",
+):
     """
     Extrae información de cursos de Moodle de forma paralela.
+    Todos los workers comparten el mismo pool de conexiones HTTP del LMS.
 
     Args:
         moodle_api_conn: Configuración de conexión a Moodle
         max_workers: Número máximo de workers para procesamiento paralelo
+            (por defecto, la concurrencia máxima del throttle del LMS)
+        incremental: Si es True, los cursos cuyo timemodified y huella no cambiaron
+            desde la última ejecución no vuelven a descargar contenidos ni matrículas
+        manifest: Registro de avance; los cursos ya extraídos en la ejecución se omiten
+        namespace: Namespace de Redis de la ejecución (run:{id}:{lms})
     """
-    moodle_client = MoodleClient(moodle_api_conn.url, moodle_api_conn.token, moodle_api_conn.lmsName)
+    # Los workers que excedan la concurrencia vigente esperan en el throttle
+    throttle = Throttle(ThrottleConfig.from_params(moodle_api_conn.report_params), moodle_api_conn.lmsName)
+    max_workers = max_workers or throttle.config.max_concurrency
+    state_store = CourseStateStore() if incremental else None
+    try:
+        with MoodleClient(
+            moodle_api_conn.url, moodle_api_conn.token, moodle_api_conn.lmsName, throttle=throttle
+        ) as moodle_client:
+            _extract_periods(
+                moodle_api_conn.periods, moodle_client, max_workers, state_store, manifest, namespace
+            )
+    finally:
+        if state_store:
+            state_store.close()
 
-    for period in moodle_api_conn.periods:
+
+def _extract_periods(
+    periods: list[str],
+    moodle_client: MoodleClient,
+    max_workers: int,
+    state_store: CourseStateStore | None,
+    manifest: RunManifest | None,
+    namespace: str,
+):
+    for period in periods:
         logger.info(f"Extrayendo información de los cursos del periodo {period}")
         courses = moodle_client.search_courses(period)
         if not courses:
@@ -113,35 +167,93 @@ def extract_courses_data_flow(moodle_api_conn: MoodleAPIConn, max_workers: int =
         filtered_courses = [
             course for course in courses if TEMPLATE not in course["shortname"]
         ]
+        if manifest:
+            extracted = manifest.done(moodle_client.name, period, EXTRACTED)
+            filtered_courses = [
+                course for course in filtered_courses if str(course["id"]) not in extracted
+            ]
+            logger.info(f"{len(extracted)} cursos del periodo {period} ya extraídos en esta ejecución")
         if not filtered_courses:
             logger.info(
                 f"No se encontraron cursos válidos (sin plantillas) para el periodo {period}"
             )
             continue
 
+        # Metadatos de todos los cursos en lotes, en lugar de una llamada por curso
+        courses_metadata = order_by_cost(
+            moodle_client.get_courses_by_ids([course["id"] for course in filtered_courses]),
+            state_store,
+            moodle_client.name,
+        )
+
         logger.info(
-            f"Procesando {len(filtered_courses)} cursos en paralelo con {max_workers} workers"
+            f"Procesando {len(courses_metadata)} cursos en paralelo con {max_workers} workers"
+        )
+        process_data(
+            courses_metadata, max_workers, process_courses_chunk, period, moodle_client, state_store, manifest, namespace
         )
-        process_data(filtered_courses, max_workers, process_courses_chunk, period, moodle_api_conn)
         
 
 
-def process_data(data: list, workers : int, process_func: Callable, *args):
-    chunks = split_data_into_chunks(data, workers)
+def _process_context():
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def process_data(
+    data: Iterable,
+    workers : int,
+    process_func: Callable,
+    *args,
+    chunk_size: int = 1,
+    backend: str = "threads",
+    on_result: Callable | None = None,
+):
+    """
+    Procesa datos en paralelo con planificación dinámica: los elementos se
+    envían en chunks pequeños (chunk_size) a medida que se libera un worker,
+    con a lo sumo dos chunks en vuelo por worker. Un chunk lento ya no deja
+    a los demás workers ociosos, y el orden de data se respeta al iniciar
+    (conviene poner primero los elementos más costosos). data puede ser un
+    iterador: se consume a medida que se envían los chunks.
+
+    Con backend="processes" cada chunk se ejecuta en un proceso aparte: la
+    función y sus argumentos deben ser serializables (sin clientes ni
+    conexiones abiertas). Los procesos se crean con forkserver (spawn donde no
+    existe), nunca con fork: los LMS corren en hilos que pueden tener tomados
+    locks de logging, SQLite o httpx, y un fork los copiaría tomados. on_result recibe en el proceso principal el
+    resultado de cada chunk y devuelve cuántos elementos se procesaron.
+    """
+    chunks = batched(data, chunk_size)
     total_processed = 0
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        future_to_chunk = {
-            executor.submit(process_func, chunk, *args): chunk
-            for chunk in chunks
-        }
-        for future in as_completed(future_to_chunk):
-            chunk = future_to_chunk[future]
-            try:
-                processed_count = future.result()
-                total_processed += processed_count
-                logger.info(f"Chunk completado: {processed_count} elementos procesados")
-            except Exception as e:
-                logger.error(f"Error procesando chunk: {str(e)}")
+    if backend == "processes":
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=_process_context())
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    with executor:
+        in_flight = set()
+
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            in_flight.add(executor.submit(process_func, list(chunk), *args))
+            return True
+
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                    processed_count = on_result(result) if on_result else result
+                    total_processed += processed_count
+                    logger.debug(f"Chunk completado: {processed_count} elementos procesados")
+                except Exception as e:
+                    logger.error(f"Error procesando chunk: {str(e)}")
+                submit_next()
     logger.info(
         f"Información procesada. Total procesados: {total_processed}"
     )
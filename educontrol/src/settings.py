@@ -11,11 +11,101 @@ class Settings(BaseSettings):
     DB_DATOSOL_NAME: str
     
     
+    # Pool de conexiones HTTP hacia Moodle
+    MOODLE_MAX_CONNECTIONS: int = 16
+    MOODLE_MAX_KEEPALIVE_CONNECTIONS: int = 16
+    MOODLE_KEEPALIVE_EXPIRY: float = 30.0
+    MOODLE_TIMEOUT: float = 60.0
+    MOODLE_CONNECT_TIMEOUT: float = 10.0
+    # Tamaño de los fragmentos al leer respuestas grandes (core_course_get_contents)
+    MOODLE_STREAM_CHUNK_SIZE: int = 65536
+
+    # Límites por instancia de Moodle (sobrescribibles con report_params["throttle"])
+    MOODLE_RATE_LIMIT: float = 0
+    MOODLE_RATE_BURST: int = 10
+    MOODLE_MIN_CONCURRENCY: int = 2
+    MOODLE_INITIAL_CONCURRENCY: int = 8
+    MOODLE_MAX_CONCURRENCY: int = 16
+    MOODLE_LATENCY_TARGET: float = 5.0
+    MOODLE_BACKOFF_FACTOR: float = 0.5
+
+    # Reintentos ante 5xx, 429 y errores de transporte (backoff exponencial con jitter)
+    MOODLE_RETRY_ATTEMPTS: int = 4
+    MOODLE_RETRY_WAIT: float = 1.0
+    MOODLE_RETRY_MAX_WAIT: float = 30.0
+    # Reintentos totales permitidos por ejecución y LMS
+    MOODLE_RETRY_BUDGET: int = 200
+
+    # Cursos por llamada a core_course_get_courses_by_field (field=ids)
+    COURSE_BATCH_SIZE: int = 100
+
+    # Paginación de core_enrol_get_enrolled_users
+    ENROLLED_PAGE_SIZE: int = 200
+    ENROLLED_ONLY_ACTIVE: bool = False
+
+    # Extracción incremental: reutiliza los cursos que no cambiaron desde la última ejecución.
+    # También registra el costo de cada curso para extraer primero los más largos
+    # (sin ella, los cursos se procesan en el orden de Moodle)
+    INCREMENTAL_EXTRACTION: bool = False
+    INCREMENTAL_MAX_AGE_HOURS: int = 168
+    STATE_DB_PATH: str = "state/educontrol.sqlite3"
+
+    # Segundos de vida de la caché de categorías (None = durante todo el proceso)
+    CATEGORY_CACHE_TTL: float | None = None
+
+    # LMS procesados en paralelo (1 = uno tras otro)
+    LMS_MAX_PARALLEL: int = 4
+
+    # Construcción del reporte cuantitativo: "pandas" (por columnas) o "rows" (fila por fila)
+    REPORT_ENGINE: str = "pandas"
+
+    # Escritura del Excel: "xlsxwriter" (constant_memory, una pasada) u "openpyxl"
+    EXCEL_ENGINE: str = "xlsxwriter"
+    # Filas a partir de las cuales el ancho de las columnas se estima sobre una muestra
+    EXCEL_WIDTH_SAMPLE_SIZE: int = 20000
+
+    # Formatos del reporte: "xlsx" y/o "parquet" (esquema estable, para BI y tendencias)
+    REPORT_FORMATS: list[str] = ["xlsx", "parquet"]
+    PARQUET_COMPRESSION: str = "zstd"
+
+    # Histórico diario de los reportes (tendencias y diferencias entre días)
+    REPORT_HISTORY_ENABLED: bool = True
+    REPORT_HISTORY_DB_PATH: str = "state/report_history.sqlite3"
+
+    # Motor de extracción: "threads" (ThreadPoolExecutor) o "asyncio"; ambos usan el throttle del LMS
+    EXTRACTION_ENGINE: str = "threads"
+    # Tope de peticiones en vuelo con asyncio (None = max_concurrency del throttle del LMS)
+    ASYNC_MAX_CONCURRENCY: int | None = None
+
+    # Pipeline: "redis" (extracción y reporte vía Redis) o "streaming" (en memoria, cola acotada)
+    PIPELINE_MODE: str = "redis"
+    STREAM_QUEUE_SIZE: int = 32
+    STREAM_PERSIST_TO_REDIS: bool = False
+
+    # Construcción de reportes por curso: "threads" o "processes" (escala con los núcleos)
+    REPORT_BUILD_BACKEND: str = "threads"
+    # Workers de la construcción (None = 10 hilos o un proceso por núcleo)
+    REPORT_BUILD_WORKERS: int | None = None
+
     # Base de datos Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: str = ""
+    # Vida de las claves de una ejecución en segundos (0 = sin expiración)
+    REDIS_KEY_TTL: int = 172800
+    # Pool de conexiones compartido por el proceso
+    REDIS_MAX_CONNECTIONS: int = 32
+    REDIS_POOL_TIMEOUT: float = 20.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # COUNT de cada SCAN y tamaño de los lotes de claves que consumen los reportes
+    REDIS_SCAN_COUNT: int = 500
+    # Comandos por pipeline en las lecturas/escrituras por lotes
+    REDIS_PIPELINE_BATCH: int = 100
+    # Codec de los valores anidados: "json" (compacto) o "zlib" (comprime sobre el umbral)
+    REDIS_CODEC: str = "zlib"
+    REDIS_COMPRESS_THRESHOLD: int = 1024
+    REDIS_COMPRESS_LEVEL: int = 3
 
     # Configuración de logging
     LOG_TO_CONSOLE: bool = True
@@ -0,0 +1,196 @@
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, List
+
+from src.build_report import build_quantitative_report
+from src.build_report_json import build_course_report, COURSE_REPORTS_LIST
+from src.extract_data_flow import TEMPLATE, order_by_cost, process_data
+from src.schemas import MoodleAPIConn
+from src.settings import settings
+from src.utils.category_finder import CategoryBuilder
+from src.utils.codecs import encode_value
+from src.utils.course_state import CourseStateStore
+from src.utils.moodle_client import MoodleClient
+from src.utils.parsers import extract_course_info
+from src.utils.redis_client import RedisClient
+from src.utils.throttle import Throttle, ThrottleConfig
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+# Marca de fin de la extracción en la cola
+_DONE = object()
+
+
+def _put(course_queue: queue.Queue, item, stop: threading.Event) -> bool:
+    """
+    Encola bloqueando mientras la cola esté llena, salvo que el consumidor haya
+    abortado. Devuelve False si se abortó.
+    """
+    while not stop.is_set():
+        try:
+            course_queue.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def produce_courses_chunk(
+    courses_chunk: List[Dict[Any, Any]],
+    period: str,
+    moodle_client: MoodleClient,
+    state_store: CourseStateStore | None,
+    course_queue: queue.Queue,
+    stop: threading.Event,
+) -> int:
+    """
+    Extrae un chunk de cursos y los deja en la cola para el constructor de reportes.
+
+    Returns:
+        int: Número de cursos encolados
+    """
+    produced = 0
+    for course in courses_chunk:
+        # Si el consumidor abortó, no se hace ninguna llamada más a Moodle
+        if stop.is_set():
+            break
+        if TEMPLATE in course["shortname"]:
+            continue
+        try:
+            course_info = state_store and state_store.get_unchanged(moodle_client.name, course)
+            if not course_info:
+                course_info = extract_course_info(course["id"], moodle_client, course)
+                if course_info and state_store:
+                    state_store.save(moodle_client.name, course, course_info)
+            if not course_info:
+                continue
+            if not _put(course_queue, (period, course["shortname"], course_info), stop):
+                break
+            produced += 1
+        except Exception as e:
+            logger.error(f"Error procesando curso {course['shortname']}: {str(e)}")
+    return produced
+
+
+def _produce_courses(
+    moodle_api_conn: MoodleAPIConn,
+    max_workers: int | None,
+    state_store: CourseStateStore | None,
+    course_queue: queue.Queue,
+    stop: threading.Event,
+):
+    try:
+        throttle = Throttle(ThrottleConfig.from_params(moodle_api_conn.report_params), moodle_api_conn.lmsName)
+        max_workers = max_workers or throttle.config.max_concurrency
+        with MoodleClient(
+            moodle_api_conn.url, moodle_api_conn.token, moodle_api_conn.lmsName, throttle=throttle
+        ) as moodle_client:
+            for period in moodle_api_conn.periods:
+                if stop.is_set():
+                    break
+                courses = moodle_client.search_courses(period) or []
+                filtered_courses = [
+                    course for course in courses if TEMPLATE not in course["shortname"]
+                ]
+                if not filtered_courses:
+                    logger.info(f"No se encontraron cursos válidos para el periodo {period}")
+                    continue
+                courses_metadata = order_by_cost(
+                    moodle_client.get_courses_by_ids([course["id"] for course in filtered_courses]),
+                    state_store,
+                    moodle_client.name,
+                )
+                process_data(
+                    courses_metadata,
+                    max_workers,
+                    produce_courses_chunk,
+                    period,
+                    moodle_client,
+                    state_store,
+                    course_queue,
+                    stop,
+                )
+    except Exception as e:
+        logger.error(f"Error en la extracción de {moodle_api_conn.lmsName}: {e}")
+    finally:
+        _put(course_queue, _DONE, stop)
+
+
+def stream_quantitative_report(
+    moodle_api_conn: MoodleAPIConn,
+    category_builder: CategoryBuilder,
+    max_workers: int | None = None,
+    incremental: bool = False,
+    persist: bool = False,
+    namespace: str = "",
+) -> dict:
+    """
+    Genera el reporte cuantitativo de un LMS sin pasar por Redis: los cursos
+    extraídos fluyen por una cola acotada directamente hacia build_course_report
+    y hacia el constructor de filas, por lo que cada curso se procesa en memoria
+    una sola vez y solo hay STREAM_QUEUE_SIZE cursos completos a la vez.
+
+    Args:
+        moodle_api_conn: Configuración de conexión a Moodle
+        category_builder: Constructor de categorías del LMS
+        max_workers: Número de workers de extracción (por defecto, la
+            concurrencia máxima del throttle del LMS)
+        incremental: Reutiliza los cursos que no cambiaron desde la última ejecución
+        persist: Si es True, además guarda cursos y reportes en Redis
+        namespace: Namespace de Redis de la ejecución (solo con persist)
+
+    Returns:
+        dict: Mismo resultado que MakeQuantitativeReport
+    """
+    ofg_pos = moodle_api_conn.report_params["ofg_pos"]
+    course_queue = queue.Queue(maxsize=settings.STREAM_QUEUE_SIZE)
+    stop = threading.Event()
+    state_store = CourseStateStore() if incremental else None
+    redis_client = RedisClient(namespace) if persist else None
+
+    producer = threading.Thread(
+        target=_produce_courses,
+        args=(moodle_api_conn, max_workers, state_store, course_queue, stop),
+        name=f"producer-{moodle_api_conn.lmsName}",
+        daemon=True,
+    )
+
+    def course_reports():
+        while (item := course_queue.get()) is not _DONE:
+            period, course_name, course_info = item
+            try:
+                course_data, module_indexes = build_course_report(course_info, course_name, ofg_pos)
+            except Exception as e:
+                logger.error(f"Error building report json for course {course_name}: {e}")
+                continue
+            if redis_client:
+                course_key = redis_client.key(period, course_name, datetime.now().strftime("%Y-%m-%d"))
+                redis_client.save_hset(course_key, course_info)
+                redis_client.push_lists(
+                    {
+                        redis_client.key(COURSE_REPORTS_LIST): [
+                            encode_value(
+                                {"course": course_key, "report": course_data, "module_indexes": module_indexes}
+                            )
+                        ]
+                    }
+                )
+            yield course_data
+
+    producer.start()
+    try:
+        return build_quantitative_report(
+            course_reports(),
+            category_builder,
+            moodle_api_conn.report_params,
+            moodle_api_conn.current_cort,
+            moodle_api_conn.lmsName,
+        )
+    finally:
+        # Si el consumidor falla, los productores dejan de esperar espacio en la cola
+        stop.set()
+        producer.join()
+        if state_store:
+            state_store.close()
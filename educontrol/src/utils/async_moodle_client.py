@@ -0,0 +1,214 @@
+import asyncio
+from collections.abc import Callable
+from typing import Any
+import httpx
+from src.settings import settings
+from src.utils.moodle_client import enrolled_users_params, parse_enrolled_users
+from src.utils.retry import RetryBudget, check_moodle_response, moodle_retry
+from src.utils.json_stream import JSONArrayParser
+from src.utils.throttle import AsyncThrottle
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+
+def build_async_http_client() -> httpx.AsyncClient:
+    """
+    Crea un cliente HTTP asíncrono con el mismo pool acotado y keep-alive
+    que usa MoodleClient.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.MOODLE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MOODLE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.MOODLE_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.MOODLE_TIMEOUT, connect=settings.MOODLE_CONNECT_TIMEOUT
+        ),
+    )
+
+
+class AsyncMoodleClient:
+    """
+    Versión asyncio de MoodleClient. Todas las llamadas pasan por el
+    AsyncThrottle del LMS (la misma ThrottleConfig que usan los hilos: token
+    bucket y límite AIMD), de modo que el ritmo y las peticiones en vuelo
+    contra el LMS quedan acotados sin importar cuántos cursos se procesen a la vez.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        name: str,
+        throttle: AsyncThrottle | None = None,
+        retry_budget: RetryBudget | None = None,
+    ):
+        self.url = url
+        self.token = token
+        self._base_params = {
+            "wstoken": self.token,
+            "moodlewsrestformat": "json"
+        }
+        self.name = name
+        self._http = build_async_http_client()
+        self.throttle = throttle or AsyncThrottle(name=name)
+        self.retry_budget = retry_budget or RetryBudget()
+        # Evita que varias corrutinas carguen a la vez el árbol de categorías
+        self.categories_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncMoodleClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        if not self._http.is_closed:
+            await self._http.aclose()
+            logger.info(f"Pool de conexiones HTTP asíncrono de {self.name} cerrado")
+
+    async def _get(self, params: dict) -> httpx.Response:
+        async with self.throttle.slot() as slot:
+            response = await self._http.get(self.url, params=self._base_params | params)
+            if response.is_server_error or response.content.startswith(b'{"exception"'):
+                slot.failed()
+        response.raise_for_status()
+        return response
+
+    @moodle_retry
+    async def _call(self, params: dict) -> Any:
+        return check_moodle_response((await self._get(params)).json())
+
+    @moodle_retry
+    async def _call_stream(self, params: dict, parse_item: Callable[[Any], Any] | None = None) -> list:
+        parser = JSONArrayParser()
+        items = []
+        async with self.throttle.slot() as slot:
+            async with self._http.stream("GET", self.url, params=self._base_params | params) as response:
+                if response.is_server_error:
+                    slot.failed()
+                if response.is_success:
+                    async for chunk in response.aiter_bytes(settings.MOODLE_STREAM_CHUNK_SIZE):
+                        items.extend(parse_item(item) if parse_item else item for item in parser.feed(chunk))
+                    items.extend(parse_item(item) if parse_item else item for item in parser.close())
+                    return items
+                await response.aread()
+        response.raise_for_status()
+
+    async def search_courses(self, criteria: str) -> list[dict]:
+        try:
+            params = {
+                "wsfunction": "core_course_search_courses",
+                "criterianame": "search",
+                "criteriavalue": criteria
+            }
+            data = await self._call(params)
+            logger.info(f"Cursos con criterio {criteria} encontrados")
+            return data["courses"]
+        except Exception as e:
+            logger.error(f"Error al buscar cursos con criterio {criteria}: {e}")
+            raise e
+
+    async def get_course_by_field(self, field: str, value: str) -> dict:
+        try:
+            params = {
+                "wsfunction": "core_course_get_courses_by_field",
+                "field": field,
+                "value": value
+            }
+            data = await self._call(params)
+            logger.info(f"Curso con {field} {value} encontrado")
+            return data["courses"][0]
+        except IndexError:
+            logger.error(f"No se encontró ningún curso con {field} {value}")
+            return None
+        except Exception as e:
+            logger.error(f"Error al buscar curso con {field} {value}: {e}")
+            raise e
+
+    async def _get_courses_batch(self, batch: list[int]) -> list[dict]:
+        try:
+            params = {
+                "wsfunction": "core_course_get_courses_by_field",
+                "field": "ids",
+                "value": ",".join(str(course_id) for course_id in batch)
+            }
+            data = await self._call(params)
+            return data["courses"]
+        except Exception as e:
+            logger.error(f"Error al obtener el lote de cursos {batch[0]}..{batch[-1]}: {e}")
+            raise e
+
+    async def get_courses_by_ids(self, course_ids: list[int], batch_size: int | None = None) -> list[dict]:
+        batch_size = batch_size or settings.COURSE_BATCH_SIZE
+        batches = await asyncio.gather(
+            *(
+                self._get_courses_batch(course_ids[start : start + batch_size])
+                for start in range(0, len(course_ids), batch_size)
+            )
+        )
+        courses = [course for batch in batches for course in batch]
+        logger.info(f"Metadatos de {len(courses)} cursos obtenidos en lotes de {batch_size}")
+        return courses
+
+    async def get_course_enrolled_users(self, course_id: int) -> dict:
+        try:
+            page_size = settings.ENROLLED_PAGE_SIZE
+            limit_from = 0
+            summary = None
+            while True:
+                users = await self._call(enrolled_users_params(course_id, limit_from, page_size))
+                summary = parse_enrolled_users(users, summary)
+                if len(users) < page_size:
+                    break
+                limit_from += page_size
+            logger.info(f"Usuarios inscritos en el curso {course_id} obtenidos")
+            return summary
+        except Exception as e:
+            logger.error(f"Error al obtener usuarios inscritos en el curso {course_id}: {e}")
+            raise e
+
+    async def get_course_contents(
+        self, course_id: int, parse_section: Callable[[dict], Any] | None = None
+    ) -> list:
+        try:
+            params = {
+                "wsfunction": "core_course_get_contents",
+                "courseid": course_id
+            }
+            data = await self._call_stream(params, parse_section)
+            logger.info(f"Contenidos del curso {course_id} obtenidos")
+            return data
+        except Exception as e:
+            logger.error(f"Error al obtener contenidos del curso {course_id}: {e}")
+            raise e
+
+    async def get_categories(self) -> list[dict]:
+        try:
+            params = {
+                "wsfunction": "core_course_get_categories",
+                "addsubcategories": 1,
+            }
+            data = await self._call(params)
+            logger.info(f"Árbol de categorías de {self.name} obtenido")
+            return data
+        except Exception as e:
+            logger.error(f"Error al obtener el árbol de categorías de {self.name}: {e}")
+            raise e
+
+    async def get_category_info(self, category_id: int, include_subcategories: bool = False) -> dict:
+        try:
+            params = {
+                "wsfunction": "core_course_get_categories",
+                'criteria[0][key]': 'id',
+                'criteria[0][value]': category_id,
+                'addsubcategories': int(include_subcategories),
+            }
+            data = await self._call(params)
+            logger.info(f"Información de la categoría {category_id} obtenida")
+            return data[0]
+        except Exception as e:
+            logger.error(f"Error al obtener información de la categoría {category_id}: {e}")
+            raise e
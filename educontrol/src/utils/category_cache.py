@@ -0,0 +1,89 @@
+import threading
+import time
+from collections.abc import Callable
+
+from src.settings import settings
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+
+class CategoryCache:
+    """
+    Árbol de categorías de un LMS cargado en memoria. Se carga de una sola vez
+    con core_course_get_categories y resuelve los paths de ids y de nombres sin
+    volver a llamar a Moodle. Es seguro compartirlo entre hilos.
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self._ttl = ttl
+        self._categories: dict[int, dict] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return self._ttl is not None and time.monotonic() - self._loaded_at > self._ttl
+
+    def load(self, categories: list[dict]):
+        tree = {
+            int(category["id"]): {"name": category["name"], "path": category["path"]}
+            for category in categories
+        }
+        # Se reemplaza el diccionario completo para que los lectores nunca vean un árbol a medias
+        self._categories = tree
+        self._loaded_at = time.monotonic()
+        logger.info(f"Árbol de categorías cargado en caché: {len(tree)} categorías")
+
+    def mark_failed(self, error: Exception):
+        """
+        Registra que la carga del árbol falló: no se vuelve a pedir hasta que
+        venza el TTL y, mientras tanto, las categorías que no estén en la caché
+        se consultan una por una con get_category_info.
+        """
+        self._loaded_at = time.monotonic()
+        logger.error(
+            f"Error al cargar el árbol de categorías, se consultará categoría por categoría: {error}"
+        )
+
+    def ensure_loaded(self, fetch: Callable[[], list[dict]]):
+        if not self.is_stale():
+            return
+        with self._lock:
+            # Otro hilo pudo haber cargado el árbol mientras se esperaba el lock
+            if self.is_stale():
+                try:
+                    self.load(fetch())
+                except Exception as e:
+                    self.mark_failed(e)
+
+    def resolve_path(self, category_id: int) -> tuple[str, str] | None:
+        categories = self._categories
+        category = categories.get(int(category_id))
+        if category is None:
+            return None
+        names = []
+        for id in category["path"].split("/"):
+            if id == "":
+                continue
+            ancestor = categories.get(int(id))
+            if ancestor is None:
+                return None
+            names.append(ancestor["name"])
+        return category["path"], "/".join(names)
+
+
+_caches: dict[str, CategoryCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_category_cache(lms_url: str) -> CategoryCache:
+    """
+    Devuelve la caché de categorías del LMS, compartida por todos los workers
+    del proceso.
+    """
+    with _caches_lock:
+        if lms_url not in _caches:
+            _caches[lms_url] = CategoryCache(ttl=settings.CATEGORY_CACHE_TTL)
+        return _caches[lms_url]
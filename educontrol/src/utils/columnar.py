@@ -0,0 +1,98 @@
+import os
+import re
+from datetime import date
+
+import pandas as pd
+
+from src.settings import settings
+from src.utils.logging.logger_factory import get_logger
+
+try:
+    import pyarrow  # noqa: F401  (motor de DataFrame.to_parquet)
+except ImportError:
+    pyarrow = None
+
+logger = get_logger()
+
+
+def _natural_key(column: str) -> list:
+    # CORTE_2 antes que CORTE_10
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", column)]
+
+
+def _infer_dtype(series: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+    if pd.api.types.is_integer_dtype(series):
+        return "Int64"
+    if pd.api.types.is_float_dtype(series):
+        return "float64"
+    return "string"
+
+
+def _cast(series: pd.Series, dtype: str) -> pd.Series:
+    if dtype in ("Int64", "float64"):
+        return pd.to_numeric(series, errors="coerce").astype(dtype)
+    return series.astype(dtype)
+
+
+def normalize_schema(
+    df: pd.DataFrame,
+    schema: dict[str, str],
+    prefix_types: dict[str, str] | None = None,
+) -> pd.DataFrame:
+    """
+    Ajusta el DataFrame a un esquema estable: las columnas del esquema van
+    primero, en su orden y con su tipo (las que falten quedan nulas); las
+    columnas dinámicas (categorías del LMS, CORTE_N) van después en orden
+    natural, con el tipo de su prefijo en prefix_types o el inferido (los
+    objetos se guardan como texto). Los valores no numéricos en columnas
+    numéricas quedan nulos.
+    """
+    prefix_types = prefix_types or {}
+    columns = {}
+    for column, dtype in schema.items():
+        if column in df.columns:
+            columns[column] = _cast(df[column], dtype)
+        else:
+            columns[column] = pd.Series(pd.NA, index=df.index, dtype=dtype)
+    extra = sorted((column for column in df.columns if column not in schema), key=_natural_key)
+    for column in extra:
+        dtype = next(
+            (dtype for prefix, dtype in prefix_types.items() if column.startswith(prefix)),
+            None,
+        ) or _infer_dtype(df[column])
+        columns[column] = _cast(df[column], dtype)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def columnar_filename(filename: str) -> str:
+    return f"{os.path.splitext(filename)[0]}.parquet"
+
+
+def write_parquet(
+    df: pd.DataFrame,
+    filename: str,
+    schema: dict[str, str],
+    prefix_types: dict[str, str] | None = None,
+    metadata: dict | None = None,
+) -> str | None:
+    """
+    Escribe el reporte en Parquet junto al Excel, con el esquema normalizado.
+    metadata agrega columnas constantes (p. ej. LMS y CORTE) para que los
+    reportes diarios puedan apilarse; FECHA_REPORTE se agrega siempre.
+
+    Returns:
+        str | None: Ruta del archivo Parquet, o None si pyarrow no está instalado
+    """
+    if pyarrow is None:
+        logger.warning("pyarrow no está instalado, no se genera el reporte Parquet")
+        return None
+    path = columnar_filename(filename)
+    df = normalize_schema(df, schema, prefix_types)
+    constants = {"FECHA_REPORTE": pd.Timestamp(date.today())} | (metadata or {})
+    for position, (column, value) in enumerate(constants.items()):
+        df.insert(position, column, value)
+    df.to_parquet(path, index=False, engine="pyarrow", compression=settings.PARQUET_COMPRESSION)
+    logger.info(f"Archivo Parquet generado exitosamente: {path}")
+    return path
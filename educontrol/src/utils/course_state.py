@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+from src.settings import settings
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+# Campos de core_course_get_courses_by_field que cambian cuando se edita el curso.
+# cacherev se incrementa con cualquier cambio en secciones o módulos.
+FINGERPRINT_FIELDS = ["timemodified", "cacherev", "categoryid", "visible", "shortname", "numsections"]
+
+
+def course_fingerprint(course: dict) -> str:
+    payload = json.dumps(
+        {field: course.get(field) for field in FINGERPRINT_FIELDS}, sort_keys=True
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def course_cost(course_info: dict) -> int:
+    """
+    Estimación del costo de extraer y construir un curso: secciones más módulos.
+    """
+    sections = course_info.get("sections") or []
+    return len(sections) + sum(len(section.get("modules") or []) for section in sections)
+
+
+class CourseStateStore:
+    """
+    Estado persistente por curso para la extracción incremental: timemodified,
+    huella de los metadatos y la información del curso ya parseada.
+    Se guarda en SQLite para sobrevivir entre ejecuciones (Redis se limpia al final).
+    """
+
+    def __init__(self, path: str | None = None):
+        path = path or settings.STATE_DB_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                create table if not exists course_state (
+                    lms text not null,
+                    course_id integer not null,
+                    timemodified integer,
+                    fingerprint text not null,
+                    course_info blob not null,
+                    extracted_at text not null,
+                    cost integer,
+                    primary key (lms, course_id)
+                )"""
+            )
+
+    def close(self):
+        self._conn.close()
+
+    def costs(self, lms: str) -> dict[int, int]:
+        """
+        Costo registrado en la última extracción de cada curso del LMS.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "select course_id, cost from course_state where lms = ? and cost is not null",
+                (lms,),
+            ).fetchall()
+        return dict(rows)
+
+    def get_unchanged(self, lms: str, course: dict) -> dict | None:
+        """
+        Devuelve la información guardada del curso si no ha cambiado desde la
+        última extracción y no es más antigua que INCREMENTAL_MAX_AGE_HOURS
+        (las matrículas no modifican timemodified). En otro caso, None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "select timemodified, fingerprint, course_info, extracted_at "
+                "from course_state where lms = ? and course_id = ?",
+                (lms, course["id"]),
+            ).fetchone()
+        if row is None:
+            return None
+        timemodified, fingerprint, course_info, extracted_at = row
+        max_age = timedelta(hours=settings.INCREMENTAL_MAX_AGE_HOURS)
+        if (
+            timemodified != course.get("timemodified")
+            or fingerprint != course_fingerprint(course)
+            or datetime.now() - datetime.fromisoformat(extracted_at) > max_age
+        ):
+            return None
+        return json.loads(zlib.decompress(course_info))
+
+    def save(self, lms: str, course: dict, course_info: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert or replace into course_state "
+                "(lms, course_id, timemodified, fingerprint, course_info, extracted_at, cost) "
+                "values (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    lms,
+                    course["id"],
+                    course.get("timemodified"),
+                    course_fingerprint(course),
+                    zlib.compress(json.dumps(course_info).encode("utf-8")),
+                    datetime.now().isoformat(),
+                    course_cost(course_info),
+                ),
+            )
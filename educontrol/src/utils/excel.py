@@ -0,0 +1,42 @@
+import pandas as pd
+
+from src.settings import settings
+
+
+def plan_column_widths(
+    df: pd.DataFrame,
+    max_width: int = 50,
+    padding: int = 2,
+    sample_size: int | None = None,
+) -> list[int]:
+    """
+    Calcula el ancho de cada columna de una hoja a partir del DataFrame que se
+    escribe en ella: el texto más largo de la columna (encabezado incluido)
+    más un margen, con un máximo de max_width caracteres. Las longitudes se
+    obtienen de forma vectorizada con astype(str).str.len(); en hojas de más
+    de sample_size filas (por defecto EXCEL_WIDTH_SAMPLE_SIZE) se estiman
+    sobre una muestra.
+
+    Returns:
+        list[int]: Ancho de cada columna, en el orden de df.columns
+    """
+    sample_size = sample_size or settings.EXCEL_WIDTH_SAMPLE_SIZE
+    if len(df) > sample_size:
+        df = df.sample(n=sample_size, random_state=0)
+    widths = []
+    for col_num, column in enumerate(df.columns):
+        max_length = len(str(column))
+        if len(df) > 0:
+            max_length = max(max_length, int(df.iloc[:, col_num].astype(str).str.len().max()))
+        widths.append(min(max_length + padding, max_width))
+    return widths
+
+
+def apply_openpyxl_widths(worksheet, df: pd.DataFrame, **kwargs):
+    """
+    Aplica a una hoja de openpyxl los anchos calculados con plan_column_widths.
+    """
+    from openpyxl.utils import get_column_letter
+
+    for col_num, width in enumerate(plan_column_widths(df, **kwargs), 1):
+        worksheet.column_dimensions[get_column_letter(col_num)].width = width
@@ -0,0 +1,147 @@
+import codecs
+import json
+import re
+from typing import Any
+
+from src.utils.retry import check_moodle_response
+
+_WHITESPACE = " \t\n\r"
+# Texto sin corchetes ni llaves, con las cadenas completas: se salta de una vez
+_SKIP = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*')
+# Dentro de una cadena que viene del fragmento anterior: comillas o escape
+_STRING_SPECIAL = re.compile(r'["\\]')
+# Fin de un elemento escalar (número, true, false, null)
+_SCALAR_END = re.compile(r"[,\]]")
+
+
+class JSONArrayParser:
+    """
+    Parser incremental de un arreglo JSON recibido por partes: feed() entrega
+    los elementos que ya llegaron completos. Cada fragmento se recorre una sola
+    vez para ubicar los límites de los elementos (profundidad y estado de
+    cadena) y cada elemento se decodifica una sola vez, al completarse; nunca
+    se tiene en memoria más que el texto del elemento en curso. Si la respuesta
+    no es un arreglo (p. ej. un "exception" de Moodle) se acumula y se valida
+    en close().
+    """
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._started = False
+        self._finished = False
+        self._is_array = True
+        # Texto del elemento en curso (o de la respuesta completa si no es arreglo)
+        self._parts: list[str] = []
+        self._in_element = False
+        # Profundidad dentro del elemento en curso (0 = valor escalar)
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        return self._scan(self._utf8.decode(chunk))
+
+    def close(self) -> list[Any]:
+        items = self._scan(self._utf8.decode(b"", final=True))
+        if not self._is_array:
+            check_moodle_response(json.loads("".join(self._parts)))
+            raise ValueError("Se esperaba un arreglo JSON en la respuesta de Moodle")
+        if not self._finished:
+            raise ValueError("Arreglo JSON incompleto en la respuesta de Moodle")
+        return items
+
+    def _emit(self, items: list[Any], text: str, start: int, end: int):
+        self._parts.append(text[start:end])
+        items.append(json.loads("".join(self._parts)))
+        self._parts = []
+        self._in_element = False
+
+    def _scan(self, text: str) -> list[Any]:
+        items = []
+        if not self._is_array:
+            self._parts.append(text)
+            return items
+        pos, start, length = 0, 0, len(text)
+        while pos < length and not self._finished:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    pos = length
+                elif match.group() == "\\":
+                    self._escape = True
+                    pos = match.end()
+                else:
+                    self._in_string = False
+                    pos = match.end()
+                    if self._depth == 0:
+                        # Elemento de tipo cadena
+                        self._emit(items, text, start, pos)
+                continue
+
+            if not self._in_element:
+                while pos < length and text[pos] in _WHITESPACE:
+                    pos += 1
+                if pos >= length:
+                    break
+                char = text[pos]
+                if not self._started:
+                    if char != "[":
+                        self._is_array = False
+                        self._parts.append(text[pos:])
+                        return items
+                    self._started = True
+                    pos += 1
+                elif char == "]":
+                    self._finished = True
+                    pos += 1
+                elif char == ",":
+                    pos += 1
+                else:
+                    self._in_element = True
+                    start = pos
+                    if char == '"':
+                        self._in_string = True
+                        pos += 1
+                    elif char in "[{":
+                        self._depth = 1
+                        pos += 1
+                continue
+
+            if self._depth == 0:
+                match = _SCALAR_END.search(text, pos)
+                if match is None:
+                    pos = length
+                    break
+                self._emit(items, text, start, match.start())
+                pos = match.start()
+                continue
+
+            # Dentro de un contenedor solo los corchetes y llaves cambian la profundidad
+            skip, depth = _SKIP.match, self._depth
+            while True:
+                pos = skip(text, pos).end()
+                if pos >= length:
+                    break
+                char = text[pos]
+                pos += 1
+                if char == '"':
+                    # Cadena sin cerrar: continúa en el siguiente fragmento
+                    self._in_string = True
+                    break
+                if char == "[" or char == "{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        self._emit(items, text, start, pos)
+                        break
+            self._depth = depth
+
+        if self._in_element:
+            # El elemento continúa en el siguiente fragmento
+            self._parts.append(text[start:])
+        return items
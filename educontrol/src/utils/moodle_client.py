@@ -1,4 +1,10 @@
+from collections.abc import Callable, Iterator
+from typing import Any
 import httpx
+from src.settings import settings
+from src.utils.throttle import Throttle
+from src.utils.retry import RetryBudget, check_moodle_response, moodle_retry
+from src.utils.json_stream import JSONArrayParser
 from src.utils.logging.logger_factory import get_logger
 
 logger = get_logger()
@@ -7,9 +13,74 @@ STUDENT_ROLE_ID = 5
 TEACHER_ROLE_ID = 3
 
 
+def build_http_client() -> httpx.Client:
+    """
+    Crea un cliente HTTP con un pool de conexiones acotado y keep-alive,
+    pensado para ser compartido por todos los workers de un mismo LMS.
+    """
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=settings.MOODLE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MOODLE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.MOODLE_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.MOODLE_TIMEOUT, connect=settings.MOODLE_CONNECT_TIMEOUT
+        ),
+    )
+
+
+ENROLLED_USER_FIELDS = "id,fullname,username,roles"
+
+
+def enrolled_users_params(course_id: int, limit_from: int, page_size: int) -> dict:
+    """
+    Parámetros de core_enrol_get_enrolled_users pidiendo solo los campos que
+    usan los reportes, paginados con limitfrom/limitnumber.
+    """
+    return {
+        "wsfunction": "core_enrol_get_enrolled_users",
+        "courseid": course_id,
+        "options[0][name]": "userfields",
+        "options[0][value]": ENROLLED_USER_FIELDS,
+        "options[1][name]": "onlyactive",
+        "options[1][value]": int(settings.ENROLLED_ONLY_ACTIVE),
+        "options[2][name]": "limitfrom",
+        "options[2][value]": limit_from,
+        "options[3][name]": "limitnumber",
+        "options[3][value]": page_size,
+    }
+
+
+def parse_enrolled_users(users: list[dict], summary: dict | None = None) -> dict:
+    """
+    Acumula una página de usuarios inscritos en una estructura compacta:
+    conteos por rol más la identidad de los docentes.
+    """
+    summary = summary or {"students_count": 0, "teachers_count": 0, "teachers": []}
+    for user in users:
+        if not user.get("roles"):
+            continue
+        if user["roles"][0]["roleid"] == STUDENT_ROLE_ID:
+            summary["students_count"] += 1
+        elif user["roles"][0]["roleid"] == TEACHER_ROLE_ID:
+            summary["teachers_count"] += 1
+            summary["teachers"].append(
+                {"fullname": user["fullname"], "username": user["username"]}
+            )
+    return summary
+
 
 class MoodleClient:
-    def __init__(self, url: str, token: str, name: str):
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        name: str,
+        http_client: httpx.Client | None = None,
+        throttle: Throttle | None = None,
+        retry_budget: RetryBudget | None = None,
+    ):
         self.url = url
         self.token = token
         self._base_params = {
@@ -17,6 +88,64 @@ class MoodleClient:
             "moodlewsrestformat": "json"
         }
         self.name = name
+        # Si no se recibe un cliente HTTP, el MoodleClient es dueño del pool y lo cierra
+        self._owns_http = http_client is None
+        self._http = http_client or build_http_client()
+        self.throttle = throttle or Throttle(name=name)
+        self.retry_budget = retry_budget or RetryBudget()
+
+    def __enter__(self) -> "MoodleClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._owns_http and not self._http.is_closed:
+            self._http.close()
+            logger.info(f"Pool de conexiones HTTP de {self.name} cerrado")
+
+    def _get(self, params: dict) -> httpx.Response:
+        """
+        Petición GET al webservice pasando por el throttle del LMS. Los 5xx,
+        timeouts y respuestas con "exception" reducen la concurrencia.
+        """
+        with self.throttle.slot() as slot:
+            response = self._http.get(self.url, params=self._base_params | params)
+            if response.is_server_error or response.content.startswith(b'{"exception"'):
+                slot.failed()
+        response.raise_for_status()
+        return response
+
+    @moodle_retry
+    def _call(self, params: dict) -> Any:
+        """
+        Llama a una función del webservice y devuelve el JSON, parseado una sola
+        vez. Los errores transitorios se reintentan con backoff y jitter mientras
+        quede presupuesto; las respuestas con "exception" lanzan MoodleError.
+        """
+        return check_moodle_response(self._get(params).json())
+
+    @moodle_retry
+    def _call_stream(self, params: dict, parse_item: Callable[[Any], Any] | None = None) -> list:
+        """
+        Como _call, para funciones que devuelven un arreglo grande: la respuesta
+        se lee por fragmentos y cada elemento se parsea (y recorta con
+        parse_item) apenas llega completo, sin cargar el JSON entero en memoria.
+        """
+        parser = JSONArrayParser()
+        items = []
+        with self.throttle.slot() as slot:
+            with self._http.stream("GET", self.url, params=self._base_params | params) as response:
+                if response.is_server_error:
+                    slot.failed()
+                if response.is_success:
+                    for chunk in response.iter_bytes(settings.MOODLE_STREAM_CHUNK_SIZE):
+                        items.extend(parse_item(item) if parse_item else item for item in parser.feed(chunk))
+                    items.extend(parse_item(item) if parse_item else item for item in parser.close())
+                    return items
+                response.read()
+        response.raise_for_status()
 
     def search_courses(self, criteria: str) -> list[dict]:
         try:
@@ -25,14 +154,9 @@ class MoodleClient:
                 "criterianame": "search",
                 "criteriavalue": criteria
             }
-            response = httpx.get(self.url, params=self._base_params | params)
-            response.raise_for_status()
+            data = self._call(params)
             logger.info(f"Cursos con criterio {criteria} encontrados")
-            if "exception" in response.json():
-                logger.error(f"Error con Moodle: {str(response.json())}")   
-# sourcery skip: raise-specific-error
-                raise Exception(str(response.json()["exception"]))
-            return response.json()["courses"]
+            return data["courses"]
         except Exception as e:
             logger.error(f"Error al buscar cursos con criterio {criteria}: {e}")
             raise e
@@ -44,13 +168,9 @@ class MoodleClient:
                 "field": field,
                 "value": value
             }
-            response = httpx.get(self.url, params=self._base_params | params)
-            response.raise_for_status()
+            data = self._call(params)
             logger.info(f"Curso con {field} {value} encontrado")
-            if "exception" in response.json():
-# sourcery skip: extract-method, raise-specific-error
-                raise Exception(f"Error con Moodle: {str(response.json())}")
-            return response.json()["courses"][0]
+            return data["courses"][0]
         except IndexError:
             logger.error(f"No se encontró ningún curso con {field} {value}")
             return None
@@ -58,52 +178,73 @@ class MoodleClient:
             logger.error(f"Error al buscar curso con {field} {value}: {e}")
             raise e
         
-    def _parse_enrolled_response(self, response: dict) -> dict:
-        students = []
-        teachers = []
-        for user in response:
-            if user["roles"][0]["roleid"] == STUDENT_ROLE_ID:
-                students.append(user)
-            elif user["roles"][0]["roleid"] == TEACHER_ROLE_ID:
-                teachers.append(user)
-        return {
-            "students": students,
-            "teachers": teachers
-        }
-    
-    def get_course_enrolled_users(self, course_id: int) -> list[dict]:
+    def get_courses_by_ids(self, course_ids: list[int], batch_size: int | None = None) -> list[dict]:
+        batch_size = batch_size or settings.COURSE_BATCH_SIZE
+        courses = []
+        for start in range(0, len(course_ids), batch_size):
+            batch = course_ids[start : start + batch_size]
+            try:
+                params = {
+                    "wsfunction": "core_course_get_courses_by_field",
+                    "field": "ids",
+                    "value": ",".join(str(course_id) for course_id in batch)
+                }
+                courses.extend(self._call(params)["courses"])
+            except Exception as e:
+                logger.error(f"Error al obtener el lote de cursos {batch[0]}..{batch[-1]}: {e}")
+                raise e
+        logger.info(f"Metadatos de {len(courses)} cursos obtenidos en lotes de {batch_size}")
+        return courses
+
+    def iter_course_enrolled_users(self, course_id: int, page_size: int | None = None) -> Iterator[list[dict]]:
+        page_size = page_size or settings.ENROLLED_PAGE_SIZE
+        limit_from = 0
+        while True:
+            users = self._call(enrolled_users_params(course_id, limit_from, page_size))
+            yield users
+            if len(users) < page_size:
+                return
+            limit_from += page_size
+
+    def get_course_enrolled_users(self, course_id: int) -> dict:
         try:
-            params = {
-                "wsfunction": "core_enrol_get_enrolled_users",
-                "courseid": course_id
-            }
-            response = httpx.get(self.url, params=self._base_params | params)
-            response.raise_for_status()
+            summary = None
+            for users in self.iter_course_enrolled_users(course_id):
+                summary = parse_enrolled_users(users, summary)
             logger.info(f"Usuarios inscritos en el curso {course_id} obtenidos")
-            if "exception" in response.json():
-                raise Exception(f"Error con Moodle: {str(response.json())}")
-            return self._parse_enrolled_response(response.json())
+            return summary
         except Exception as e:
             logger.error(f"Error al obtener usuarios inscritos en el curso {course_id}: {e}")
             raise e
         
         
-    def get_course_contents(self, course_id: int) -> dict:
+    def get_course_contents(self, course_id: int, parse_section: Callable[[dict], Any] | None = None) -> list:
         try:
             params = {
                 "wsfunction": "core_course_get_contents",
                 "courseid": course_id
             }
-            response = httpx.get(self.url, params=self._base_params | params)
-            response.raise_for_status()
+            # Las secciones se recortan a medida que llegan (ver parse_course_section)
+            data = self._call_stream(params, parse_section)
             logger.info(f"Contenidos del curso {course_id} obtenidos")
-            if "exception" in response.json():
-                raise Exception(f"Error con Moodle: {str(response.json())}")
-            return response.json()
+            return data
         except Exception as e:
             logger.error(f"Error al obtener contenidos del curso {course_id}: {e}")
             raise e
         
+    def get_categories(self) -> list[dict]:
+        try:
+            params = {
+                "wsfunction": "core_course_get_categories",
+                "addsubcategories": 1,
+            }
+            data = self._call(params)
+            logger.info(f"Árbol de categorías de {self.name} obtenido")
+            return data
+        except Exception as e:
+            logger.error(f"Error al obtener el árbol de categorías de {self.name}: {e}")
+            raise e
+
     def get_category_info(self, category_id: int, include_subcategories: bool = False) -> dict:
         try:
             params = {
@@ -112,12 +253,9 @@ class MoodleClient:
                 'criteria[0][value]': category_id,
                 'addsubcategories': int(include_subcategories),
             }
-            response = httpx.get(self.url, params=self._base_params | params)
-            response.raise_for_status()
+            data = self._call(params)
             logger.info(f"Información de la categoría {category_id} obtenida")
-            if "exception" in response.json():
-                raise Exception(f"Error con Moodle: {str(response.json())}")
-            return response.json()[0]
+            return data[0]
         except Exception as e:
             logger.error(f"Error al obtener información de la categoría {category_id}: {e}")
             raise e
@@ -129,12 +267,9 @@ class MoodleClient:
                 "wsfunction": "gradereport_user_get_grade_items",
                 "courseid": course_id
             }
-            response = httpx.get(self.url, params=self._base_params | params)
-            response.raise_for_status()
+            data = self._call(params)
             logger.info(f"Informe de calificaciones del curso {course_id} obtenido")
-            if "exception" in response.json():
-                raise Exception(f"Error con Moodle: {str(response.json())}")
-            return response.json()["usergrades"][0]["gradeitems"]
+            return data["usergrades"][0]["gradeitems"]
         except Exception as e:
             logger.error(f"Error al obtener informe de calificaciones del curso {course_id}: {e}")
             raise e
@@ -1,4 +1,7 @@
+import asyncio
 from src.utils.moodle_client import MoodleClient
+from src.utils.async_moodle_client import AsyncMoodleClient
+from src.utils.category_cache import get_category_cache
 from src.utils.logging.logger_factory import get_logger
 
 fields = [
@@ -24,6 +27,11 @@ GRADO = "CESDEL-CARRERAS(NEW)"
 def parse_category_path(
     category_id: int, moodle_client: MoodleClient
 ) -> tuple[str, str]:
+    category_cache = get_category_cache(moodle_client.url)
+    category_cache.ensure_loaded(moodle_client.get_categories)
+    if resolved := category_cache.resolve_path(category_id):
+        return resolved
+    logger.warning(f"Categoría {category_id} no encontrada en caché, consultando a Moodle")
     category_info = moodle_client.get_category_info(category_id)
     category_id_path = category_info["path"]
     category_name_path = "/".join(
@@ -33,17 +41,44 @@ def parse_category_path(
     return category_id_path, category_name_path
 
 
+async def parse_category_path_async(
+    category_id: int, moodle_client: AsyncMoodleClient
+) -> tuple[str, str]:
+    category_cache = get_category_cache(moodle_client.url)
+    if category_cache.is_stale():
+        async with moodle_client.categories_lock:
+            if category_cache.is_stale():
+                try:
+                    category_cache.load(await moodle_client.get_categories())
+                except Exception as e:
+                    category_cache.mark_failed(e)
+    if resolved := category_cache.resolve_path(category_id):
+        return resolved
+    logger.warning(f"Categoría {category_id} no encontrada en caché, consultando a Moodle")
+    category_info = await moodle_client.get_category_info(category_id)
+    category_id_path = category_info["path"]
+    ancestors = await asyncio.gather(
+        *(
+            moodle_client.get_category_info(int(id))
+            for id in category_id_path.split("/") if id != ""
+        )
+    )
+    category_name_path = "/".join(ancestor["name"] for ancestor in ancestors)
+    return category_id_path, category_name_path
+
+
 def parse_course_sections(sections: list) -> dict:
-    return [
-        {
-            "sectionId": section["id"],
-            "sectionNo": section["section"],
-            "sectionName": section["name"],
-            "sectionVisible": section["visible"],
-            "modules": parse_section_modules(section["modules"]),
-        }
-        for section in sections
-    ]
+    return [parse_course_section(section) for section in sections]
+
+
+def parse_course_section(section: dict) -> dict:
+    return {
+        "sectionId": section["id"],
+        "sectionNo": section["section"],
+        "sectionName": section["name"],
+        "sectionVisible": section["visible"],
+        "modules": parse_section_modules(section["modules"]),
+    }
 
 
 def parse_section_modules(modules: list) -> dict:
@@ -82,9 +117,10 @@ def parse_moodle_contents(contents: list) -> dict:
     ]
 
 
-def extract_course_info(course_id: int, moodle_client: MoodleClient) -> dict:
+def extract_course_info(course_id: int, moodle_client: MoodleClient, course: dict | None = None) -> dict:
     logger.info(f"Extrayendo información del curso {course_id}")
-    course = moodle_client.get_course_by_field("id", course_id)
+    # Los metadatos suelen venir ya de get_courses_by_ids; solo se piden si faltan
+    course = course or moodle_client.get_course_by_field("id", course_id)
     if not course:
         return None
     data = {
@@ -92,13 +128,37 @@ def extract_course_info(course_id: int, moodle_client: MoodleClient) -> dict:
     }
     data["category_id_path"], data["category_name_path"] = parse_category_path(data["categoryid"], moodle_client)
     data |= moodle_client.get_course_enrolled_users(course_id)
-    data["sections"] = parse_course_sections(moodle_client.get_course_contents(course_id))
+    data["sections"] = moodle_client.get_course_contents(course_id, parse_course_section)
     #if moodle_client.name == GRADO:
         #grade_report = [] #moodle_client.get_course_grade_report(course_id)
         #data["grade_report"] = grade_report #parse_grade_report(grade_report)
     logger.info(f"Información del curso {course_id} extraída")
     
     return data
+
+
+async def extract_course_info_async(course: dict, moodle_client: AsyncMoodleClient) -> dict:
+    """
+    Igual que extract_course_info, pero lanza a la vez todas las llamadas a
+    Moodle del curso. Recibe los metadatos del curso ya obtenidos con
+    get_courses_by_ids.
+    """
+    course_id = course["id"]
+    logger.info(f"Extrayendo información del curso {course_id}")
+    category_paths, enrolled_users, sections = await asyncio.gather(
+        parse_category_path_async(course["categoryid"], moodle_client),
+        moodle_client.get_course_enrolled_users(course_id),
+        moodle_client.get_course_contents(course_id, parse_course_section),
+    )
+    data = {
+        key: value for key, value in course.items() if key in fields
+    }
+    data["category_id_path"], data["category_name_path"] = category_paths
+    data |= enrolled_users
+    data["sections"] = sections
+    logger.info(f"Información del curso {course_id} extraída")
+
+    return data
     
 
 def parse_grade_report(grade_report: list) -> dict:
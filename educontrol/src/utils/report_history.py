@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import threading
+from datetime import date
+
+import pandas as pd
+
+from src.settings import settings
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+# Columna de categorías que identifica el periodo según el constructor del LMS
+PERIOD_COLUMNS = ("PERIODO", "AÑO")
+
+
+class ReportHistory:
+    """
+    Histórico local de los reportes cuantitativos: una fila por curso y por
+    día, con clave LMS, periodo, corte y fecha. Guarda las columnas que se
+    comparan entre días (estados y totales) y la fila completa en JSON, de modo
+    que las tendencias y diferencias se consultan sin volver a abrir los Excel.
+    Un nuevo reporte del mismo día reemplaza al anterior.
+    """
+
+    def __init__(self, path: str | None = None):
+        path = path or settings.REPORT_HISTORY_DB_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Varios LMS pueden escribir a la vez: WAL y espera ante bloqueos
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.execute(
+                """
+                create table if not exists quantitative_history (
+                    lms text not null,
+                    period text not null,
+                    cut integer not null,
+                    report_date text not null,
+                    course_shortname text not null,
+                    teacher_cedula text,
+                    teacher_name text,
+                    facultad text,
+                    carrera text,
+                    total_recursos integer,
+                    estado_recursos text,
+                    total_actividades integer,
+                    estado_actividades text,
+                    row text not null,
+                    primary key (lms, period, cut, report_date, course_shortname)
+                )"""
+            )
+            self._conn.execute(
+                "create index if not exists ix_quantitative_course "
+                "on quantitative_history (course_shortname, report_date)"
+            )
+            self._conn.execute(
+                "create index if not exists ix_quantitative_teacher "
+                "on quantitative_history (teacher_cedula, report_date)"
+            )
+            self._conn.execute(
+                "create index if not exists ix_quantitative_date "
+                "on quantitative_history (lms, report_date)"
+            )
+
+    def __enter__(self) -> "ReportHistory":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def append(
+        self, lms: str, cut: int, rows: list[dict] | pd.DataFrame, report_date: date | None = None
+    ) -> int:
+        """
+        Guarda las filas del reporte cuantitativo de un LMS y corte como la
+        instantánea del día: la instantánea anterior del mismo día se borra
+        completa, así los cursos que ya no están en el reporte no quedan.
+        Un reporte vacío no toca el histórico.
+
+        Returns:
+            int: Número de filas guardadas
+        """
+        report_date = (report_date or date.today()).isoformat()
+        df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        if df.empty:
+            return 0
+        period = pd.Series("", index=df.index)
+        for column in reversed(PERIOD_COLUMNS):
+            if column in df.columns:
+                values = df[column]
+                period = values.astype(str).where(values.notna() & (values != ""), period)
+
+        def column(name: str) -> list:
+            if name not in df.columns:
+                return [None] * len(df)
+            return df[name].astype(object).where(df[name].notna(), None).tolist()
+
+        # La fila completa en JSON, serializada por pandas de una vez
+        row_json = df.to_json(orient="records", lines=True, force_ascii=False).splitlines()
+        records = zip(
+            [lms] * len(df),
+            period.tolist(),
+            [cut] * len(df),
+            [report_date] * len(df),
+            column("NOMBRE"),
+            column("PROFESOR CEDULA"),
+            column("PROFESOR NOMBRE"),
+            column("FACULTAD"),
+            column("CARRERA"),
+            column("TOTAL_RECURSOS"),
+            column("ESTADO_RECURSOS"),
+            column("TOTAL_ACTIVIDADES"),
+            column("ESTADO_ACTIVIDADES"),
+            row_json,
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                "delete from quantitative_history where lms = ? and cut = ? and report_date = ?",
+                (lms, cut, report_date),
+            )
+            self._conn.executemany(
+                "insert or replace into quantitative_history "
+                "(lms, period, cut, report_date, course_shortname, teacher_cedula, teacher_name, "
+                "facultad, carrera, total_recursos, estado_recursos, total_actividades, "
+                "estado_actividades, row) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+        logger.info(f"{len(df)} cursos de {lms} guardados en el histórico del {report_date}")
+        return len(df)
+
+    def _query(self, sql: str, params: tuple) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def course_trend(self, course_shortname: str, lms: str | None = None) -> list[dict]:
+        """
+        Evolución diaria de totales y estados de un curso.
+        """
+        return self._query(
+            "select lms, period, cut, report_date, total_recursos, estado_recursos, "
+            "total_actividades, estado_actividades from quantitative_history "
+            "where course_shortname = ? and (? is null or lms = ?) order by report_date",
+            (course_shortname, lms, lms),
+        )
+
+    def teacher_trend(self, teacher_cedula: str) -> list[dict]:
+        """
+        Evolución diaria de los cursos de un docente.
+        """
+        return self._query(
+            "select lms, period, cut, report_date, course_shortname, total_recursos, "
+            "estado_recursos, total_actividades, estado_actividades from quantitative_history "
+            "where teacher_cedula = ? order by report_date, course_shortname",
+            (teacher_cedula,),
+        )
+
+    def compliance_trend(self, lms: str, period: str | None = None) -> list[dict]:
+        """
+        Por día y corte: cursos totales y cursos en cada estado de recursos y actividades.
+        """
+        return self._query(
+            "select report_date, cut, count(*) as total_cursos, "
+            "sum(estado_recursos = 'SUFICIENTE') as recursos_suficiente, "
+            "sum(estado_recursos = 'INSUFICIENTE') as recursos_insuficiente, "
+            "sum(estado_recursos = 'DEFICIENTE') as recursos_deficiente, "
+            "sum(estado_actividades = 'SUFICIENTE') as actividades_suficiente, "
+            "sum(estado_actividades = 'INSUFICIENTE') as actividades_insuficiente, "
+            "sum(estado_actividades = 'DEFICIENTE') as actividades_deficiente "
+            "from quantitative_history where lms = ? and (? is null or period = ?) "
+            "group by report_date, cut order by report_date, cut",
+            (lms, period, period),
+        )
+
+    def deltas(self, lms: str, from_date: date, to_date: date) -> list[dict]:
+        """
+        Cursos cuyo estado de recursos o de actividades cambió entre dos fechas.
+        """
+        return self._query(
+            "select new.period, new.cut, new.course_shortname, new.teacher_cedula, "
+            "old.total_recursos as total_recursos_antes, new.total_recursos, "
+            "old.estado_recursos as estado_recursos_antes, new.estado_recursos, "
+            "old.total_actividades as total_actividades_antes, new.total_actividades, "
+            "old.estado_actividades as estado_actividades_antes, new.estado_actividades "
+            "from quantitative_history new join quantitative_history old "
+            "on old.lms = new.lms and old.period = new.period and old.cut = new.cut "
+            "and old.course_shortname = new.course_shortname "
+            "where new.lms = ? and old.report_date = ? and new.report_date = ? "
+            "and (old.estado_recursos is not new.estado_recursos "
+            "or old.estado_actividades is not new.estado_actividades) "
+            "order by new.course_shortname",
+            (lms, from_date.isoformat(), to_date.isoformat()),
+        )
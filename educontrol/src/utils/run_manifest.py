@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from src.settings import settings
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+# Etapas de un LMS dentro de una ejecución
+EXTRACTING = "extracting"
+BUILDING = "building"
+REPORTING = "reporting"
+REPORTED = "reported"
+
+# Etapas de un curso dentro de un LMS y periodo
+EXTRACTED = "extracted"
+BUILT = "built"
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    with conn:
+        conn.execute("pragma journal_mode=wal")
+        conn.execute(
+            """
+            create table if not exists runs (
+                run_id text primary key,
+                started_at text not null,
+                finished_at text
+            )"""
+        )
+        conn.execute(
+            """
+            create table if not exists run_lms (
+                run_id text not null,
+                lms text not null,
+                stage text not null,
+                primary key (run_id, lms)
+            )"""
+        )
+        conn.execute(
+            """
+            create table if not exists run_courses (
+                run_id text not null,
+                lms text not null,
+                period text not null,
+                stage text not null,
+                item text not null,
+                primary key (run_id, lms, period, stage, item)
+            )"""
+        )
+    return conn
+
+
+class RunManifest:
+    """
+    Registro persistente del avance de una ejecución: etapa de cada LMS y, por
+    LMS y periodo, qué cursos ya se extrajeron y cuáles ya se construyeron como
+    filas del reporte. Permite retomar una ejecución interrumpida con --resume.
+    """
+
+    def __init__(self, run_id: str, path: str | None = None):
+        self.run_id = run_id
+        self._conn = _connect(path or settings.STATE_DB_PATH)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert or ignore into runs (run_id, started_at) values (?, ?)",
+                (run_id, datetime.now().isoformat()),
+            )
+
+    @classmethod
+    def start(cls, resume: bool = False, path: str | None = None) -> "RunManifest":
+        """
+        Crea una ejecución nueva o, con resume=True, retoma la última que no terminó.
+        """
+        if resume:
+            conn = _connect(path or settings.STATE_DB_PATH)
+            row = conn.execute(
+                "select run_id from runs where finished_at is null "
+                "order by started_at desc limit 1"
+            ).fetchone()
+            conn.close()
+            if row:
+                logger.info(f"Retomando la ejecución {row[0]}")
+                return cls(row[0], path)
+            logger.warning("No hay ejecuciones pendientes para retomar, se inicia una nueva")
+        run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+        logger.info(f"Iniciando la ejecución {run_id}")
+        return cls(run_id, path)
+
+    def close(self):
+        self._conn.close()
+
+    def finish(self):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "update runs set finished_at = ? where run_id = ?",
+                (datetime.now().isoformat(), self.run_id),
+            )
+        logger.info(f"Ejecución {self.run_id} finalizada")
+
+    def lms_stage(self, lms: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "select stage from run_lms where run_id = ? and lms = ?",
+                (self.run_id, lms),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_lms_stage(self, lms: str, stage: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert or replace into run_lms (run_id, lms, stage) values (?, ?, ?)",
+                (self.run_id, lms, stage),
+            )
+
+    def mark_done(self, lms: str, period: str, stage: str, item: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert or ignore into run_courses (run_id, lms, period, stage, item) "
+                "values (?, ?, ?, ?, ?)",
+                (self.run_id, lms, period, stage, str(item)),
+            )
+
+    def done(self, lms: str, period: str, stage: str) -> set[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "select item from run_courses "
+                "where run_id = ? and lms = ? and period = ? and stage = ?",
+                (self.run_id, lms, period, stage),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def reset(self, lms: str, stage: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "delete from run_courses where run_id = ? and lms = ? and stage = ?",
+                (self.run_id, lms, stage),
+            )
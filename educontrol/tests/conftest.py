@@ -0,0 +1,15 @@
+import os
+import sys
+
+# Los módulos se importan como src.* desde la raíz de educontrol
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings exige las credenciales de la base; los tests no se conectan
+for variable in (
+    "DB_DATOSOL_USER",
+    "DB_DATOSOL_PASSWORD",
+    "DB_DATOSOL_SERVER",
+    "DB_DATOSOL_PORT",
+    "DB_DATOSOL_NAME",
+):
+    os.environ.setdefault(variable, "test")
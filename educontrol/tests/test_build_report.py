@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from src.build_report import build_quantitative_report, classify_totals
+from src.utils.category_finder import GradeCategoryBuilder, PostCategoryBuilder
+
+PARAMS = {"resources-cort-1": 8, "activity-cort-1": 5}
+TIPOS = ["APROBACION REGULAR", "APROBACION TUTORIA", "OTRA"]
+CONTADORES = [
+    "T_links_clases", "T_links", "T_archivos", "T_label", "T_pags", "T_libros",
+    "T_tareas", "T_quiz", "T_glosario", "T_taller", "T_leccion", "T_foro", "T_wiki",
+    "T_chat", "T_mapaMental", "T_actividades_abiertas",
+    "CP1-ACT", "CP1-ACTF", "CP2-ACT", "CP2-ACTF", "CP3-ACT", "CP3-ACTF", "CS-ACTF", "CF-ACTF",
+]
+
+
+def _course(index: int, rng: random.Random, categories: int) -> dict:
+    teachers = rng.randint(0, 2)
+    course = {
+        "course_name": f"CURSO-{index}",
+        "OFG": str(rng.randint(1, 9)),
+        "Total_Estudiantes": rng.randint(0, 40),
+        "Total_Secciones": rng.randint(1, 12),
+        "Total_Docentes": teachers,
+        "Docentes": ",".join(f"Docente {index}-{t}:{1000 + t}" for t in range(teachers)) or "-",
+        "S0_Nombre": "General",
+        **{f"Categoria_{i}": f"CAT{i}-{index % 3}" for i in range(1, categories)},
+        f"Categoria_{categories}": TIPOS[index % 3],
+    }
+    return course | {field: rng.randint(0, 4) for field in CONTADORES}
+
+
+@pytest.mark.parametrize("builder, categories", [(GradeCategoryBuilder, 5), (PostCategoryBuilder, 6)])
+def test_columnar_engine_matches_rows_engine(builder, categories):
+    rng = random.Random(categories)
+    courses = [_course(i, rng, categories) for i in range(300)]
+    # Cursos con problemas: OFG no numérico, docente sin cédula y campo faltante
+    courses[1]["OFG"] = "X"
+    courses[4] |= {"Total_Docentes": 1, "Docentes": "Sin cedula"}
+    del courses[7]["T_wiki"]
+    courses[9] |= {"Total_Docentes": 0, "Docentes": "-", "T_quiz": None}
+
+    rows = build_quantitative_report(iter(courses), builder(), PARAMS, 1, engine="rows")
+    columnar = build_quantitative_report(iter(courses), builder(), PARAMS, 1, engine="pandas")
+
+    records = columnar["excel"].to_dict("records")
+    assert records == rows["excel"]
+    assert [list(row) for row in records] == [list(row) for row in rows["excel"]]
+    assert sorted(columnar["SIN PROFESORES"]) == sorted(rows["SIN PROFESORES"])
+    assert sorted(columnar["CON PROBLEMAS"]) == sorted(rows["CON PROBLEMAS"])
+
+
+def test_classify_totals_thresholds():
+    import pandas as pd
+
+    estados = classify_totals(pd.Series([10, 8, 7, 5, 4, 0]), 8)
+
+    assert list(estados) == [
+        "SUFICIENTE", "SUFICIENTE", "INSUFICIENTE", "INSUFICIENTE", "DEFICIENTE", "DEFICIENTE",
+    ]
+
+
+def test_columnar_engine_without_courses():
+    report = build_quantitative_report(iter([]), GradeCategoryBuilder(), PARAMS, 1, engine="pandas")
+
+    assert report["excel"].empty
+    assert report["SIN PROFESORES"] == [] and report["CON PROBLEMAS"] == []
@@ -0,0 +1,37 @@
+from src.utils.category_cache import CategoryCache
+
+CATEGORIES = [
+    {"id": 1, "name": "Grado", "path": "/1"},
+    {"id": 2, "name": "2026-1", "path": "/1/2"},
+]
+
+
+def test_resolves_paths_from_the_loaded_tree():
+    cache = CategoryCache()
+    cache.ensure_loaded(lambda: CATEGORIES)
+
+    assert cache.resolve_path(2) == ("/1/2", "Grado/2026-1")
+    assert cache.resolve_path(3) is None
+
+
+def test_failed_load_is_not_retried_until_the_ttl_expires():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        raise PermissionError("accessexception")
+
+    cache = CategoryCache(ttl=3600)
+    cache.ensure_loaded(fetch)
+    cache.ensure_loaded(fetch)
+
+    assert len(calls) == 1
+    assert cache.resolve_path(2) is None
+
+
+def test_failed_load_is_retried_after_the_ttl():
+    cache = CategoryCache(ttl=0)
+    cache.ensure_loaded(lambda: (_ for _ in ()).throw(RuntimeError("timeout")))
+    cache.ensure_loaded(lambda: CATEGORIES)
+
+    assert cache.resolve_path(2) == ("/1/2", "Grado/2026-1")
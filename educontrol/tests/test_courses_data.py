@@ -0,0 +1,25 @@
+from unittest.mock import MagicMock
+
+from src.build_report import get_courses_data
+from src.utils.codecs import encode_value
+
+
+def _record(course: str, total: int) -> str:
+    return encode_value(
+        {"course": course, "report": {"NOMBRE": course, "T_tareas": total}, "module_indexes": {course: total}}
+    )
+
+
+def test_rebuilt_courses_are_counted_once():
+    redis_client = MagicMock()
+    redis_client.drain_list.return_value = iter(
+        [[_record("run:1:LMS:P:A:d", 1), _record("run:1:LMS:P:B:d", 2)], [_record("run:1:LMS:P:A:d", 3)]]
+    )
+
+    reports, module_indexes = get_courses_data(redis_client)
+
+    assert sorted((report["NOMBRE"], report["T_tareas"]) for report in reports) == [
+        ("run:1:LMS:P:A:d", 3),
+        ("run:1:LMS:P:B:d", 2),
+    ]
+    assert module_indexes == {"run:1:LMS:P:A:d": 3, "run:1:LMS:P:B:d": 2}
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from src.utils.json_stream import JSONArrayParser
+from src.utils.retry import MoodleError
+
+
+def _parse(payload: bytes, chunk_size: int) -> list:
+    parser = JSONArrayParser()
+    items = []
+    for start in range(0, len(payload), chunk_size):
+        items.extend(parser.feed(payload[start:start + chunk_size]))
+    items.extend(parser.close())
+    return items
+
+
+def _section(index: int, modules: int) -> dict:
+    return {
+        "id": index,
+        "name": f"Sección {index} — \"unidad\" [{index}]",
+        "summary": "<p>Texto con \\ barra, {llaves} y, comas</p>",
+        "modules": [
+            {
+                "id": module,
+                "modname": "resource",
+                "name": f"Recurso {module} ñ",
+                "contents": [{"filename": f"archivo_{module}.pdf", "filesize": module * 10}],
+                "visible": 1,
+            }
+            for module in range(modules)
+        ],
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 65536])
+def test_parses_like_json_loads(chunk_size):
+    data = [_section(i, 5) for i in range(4)] + ["cadena \\\" ]", 12, -3.5e2, True, None, [], {}]
+    payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    assert _parse(payload, chunk_size) == data
+
+
+def test_single_large_section_is_decoded_once(monkeypatch):
+    section = _section(1, 40000)
+    payload = json.dumps([section], ensure_ascii=False).encode("utf-8")
+    assert len(payload) > 4_000_000
+
+    calls = []
+    loads = json.loads
+    monkeypatch.setattr(json, "loads", lambda text, **kwargs: calls.append(len(text)) or loads(text, **kwargs))
+
+    assert _parse(payload, 65536) == [section]
+    # Un solo decode del elemento completo, no uno por fragmento recibido
+    assert len(calls) == 1
+
+
+def test_moodle_exception_raises_moodle_error():
+    payload = json.dumps({"exception": "webservice_access_exception", "message": "x"}).encode()
+
+    with pytest.raises(MoodleError):
+        _parse(payload, 5)
+
+
+def test_incomplete_array_raises():
+    with pytest.raises(ValueError):
+        _parse(b'[{"id": 1}, {"id": 2', 4)
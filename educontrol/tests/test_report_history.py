@@ -0,0 +1,46 @@
+from datetime import date
+
+import pandas as pd
+
+from src.utils.report_history import ReportHistory
+
+DAY = date(2026, 3, 2)
+
+
+def _row(course: str, estado: str = "SUFICIENTE") -> dict:
+    return {
+        "PERIODO": "2026-1",
+        "NOMBRE": course,
+        "PROFESOR CEDULA": "0102",
+        "TOTAL_RECURSOS": 9,
+        "ESTADO_RECURSOS": estado,
+        "TOTAL_ACTIVIDADES": 6,
+        "ESTADO_ACTIVIDADES": estado,
+    }
+
+
+def test_rerun_on_the_same_day_replaces_the_snapshot(tmp_path):
+    with ReportHistory(str(tmp_path / "history.sqlite3")) as history:
+        history.append("LMS", 1, [_row("A"), _row("B")], report_date=DAY)
+        history.append("LMS", 1, pd.DataFrame([_row("A", "DEFICIENTE")]), report_date=DAY)
+
+        trend = history.compliance_trend("LMS")
+
+    assert [(day["total_cursos"], day["recursos_deficiente"]) for day in trend] == [(1, 1)]
+
+
+def test_snapshot_keeps_other_cuts_and_days(tmp_path):
+    with ReportHistory(str(tmp_path / "history.sqlite3")) as history:
+        history.append("LMS", 1, [_row("A"), _row("B")], report_date=date(2026, 3, 1))
+        history.append("LMS", 2, [_row("A"), _row("B")], report_date=DAY)
+        history.append("LMS", 1, [_row("A", "DEFICIENTE")], report_date=DAY)
+
+        trend = history.compliance_trend("LMS")
+        deltas = history.deltas("LMS", date(2026, 3, 1), DAY)
+
+    assert [(day["report_date"], day["cut"], day["total_cursos"]) for day in trend] == [
+        ("2026-03-01", 1, 2),
+        ("2026-03-02", 1, 1),
+        ("2026-03-02", 2, 2),
+    ]
+    assert [delta["course_shortname"] for delta in deltas] == ["A"]
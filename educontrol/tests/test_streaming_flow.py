@@ -0,0 +1,25 @@
+import queue
+import threading
+from unittest.mock import MagicMock
+
+from src.streaming_flow import produce_courses_chunk
+
+
+def test_producer_stops_before_calling_moodle_once_the_consumer_aborts():
+    moodle_client = MagicMock()
+    course_queue = queue.Queue()
+    stop = threading.Event()
+    stop.set()
+
+    produced = produce_courses_chunk(
+        [{"id": 1, "shortname": "A"}, {"id": 2, "shortname": "B"}],
+        "2026-1",
+        moodle_client,
+        None,
+        course_queue,
+        stop,
+    )
+
+    assert produced == 0
+    assert moodle_client.mock_calls == []
+    assert course_queue.empty()
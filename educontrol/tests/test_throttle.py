@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from src.utils.throttle import AsyncThrottle, ThrottleConfig
+
+
+def _run_requests(throttle: AsyncThrottle, requests: int) -> int:
+    in_flight = peak = 0
+
+    async def request():
+        nonlocal in_flight, peak
+        async with throttle.slot():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(requests)))
+
+    asyncio.run(main())
+    return peak
+
+
+def test_async_throttle_takes_the_concurrency_from_report_params():
+    config = ThrottleConfig.from_params(
+        {"throttle": {"min_concurrency": 1, "initial_concurrency": 3, "max_concurrency": 3}}
+    )
+
+    assert _run_requests(AsyncThrottle(config, "LMS"), 20) == 3
+
+
+def test_async_throttle_applies_the_rate_limit():
+    config = ThrottleConfig.from_params({"throttle": {"rate_limit": 50, "burst": 1}})
+
+    start = time.monotonic()
+    _run_requests(AsyncThrottle(config, "LMS"), 6)
+
+    # Un token inicial y cinco más a 50 por segundo
+    assert time.monotonic() - start >= 0.09
+
+
+def test_async_throttle_backs_off_on_failures():
+    config = ThrottleConfig(min_concurrency=1, initial_concurrency=8, max_concurrency=8)
+    throttle = AsyncThrottle(config, "LMS")
+
+    async def failing_request():
+        async with throttle.slot() as slot:
+            slot.failed()
+
+    asyncio.run(failing_request())
+
+    assert throttle.concurrency == 4
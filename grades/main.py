@@ -5,7 +5,7 @@ Proyecto Grades - Reportes de Calificaciones
 from src.utils.logging.logger_factory import setup_logging
 from src.extract_data_flow import extract_grades_data_flow
 from src.build_report import get_grades_data, make_grades_report
-from src.utils.redis_client import RedisClient
+from src.utils.redis_client import RedisClient, run_namespace
 from src.settings import settings
 import pandas as pd
 
@@ -17,8 +17,9 @@ def main():
     # Inicializar logging
     setup_logging()
     
-    # Crear cliente de Redis
-    redis_client = RedisClient()
+    # Crear cliente de Redis con las claves aisladas por ejecución
+    namespace = run_namespace(pd.Timestamp.now().strftime('%Y%m%d%H%M%S'), settings.MOODLE_NAME)
+    redis_client = RedisClient(namespace)
     
     # Extraer datos de calificaciones de Moodle en paralelo
     extract_grades_data_flow(
@@ -27,19 +28,19 @@ def main():
         moodle_name=settings.MOODLE_NAME,
         patterns=settings.COURSE_PATTERNS,
         ofg_pos=settings.OFG_POS,
-        max_workers=8
+        namespace=namespace
     )
     
     # Obtener datos de Redis (ya vienen las filas completas del Excel)
-    excel_data = get_grades_data(redis_client, settings.COURSE_PATTERNS)
+    excel_data = get_grades_data(redis_client, settings.COURSE_PATTERNS, settings.MOODLE_NAME)
     
     # Generar archivo Excel
     timestamp = pd.Timestamp.now().strftime('%Y%m%d')
     filename = f"reporte_calificaciones_{timestamp}.xlsx"
-    make_grades_report(excel_data, filename=filename)
+    filename = make_grades_report(excel_data, filename=filename, metadata={"LMS": settings.MOODLE_NAME})
     
-    # Limpiar Redis
-    redis_client.client.flushall()
+    # Limpiar solo las claves de esta ejecución
+    redis_client.delete_namespace()
     
     print(f"Reporte generado exitosamente: {filename}")
 
@@ -1,13 +1,18 @@
 import pandas as pd
 from datetime import datetime
+from itertools import batched
 
+from src.settings import settings
 from src.utils.redis_client import RedisClient
+from src.utils.columnar import write_parquet
+from src.utils.excel import apply_openpyxl_widths
+from src.utils.report_history import GradesHistory
 from src.utils.logging.logger_factory import get_logger
 
 logger = get_logger()
 
 
-def get_grades_data(redis_client: RedisClient, patterns: list[str]) -> list[dict]:
+def get_grades_data(redis_client: RedisClient, patterns: list[str], lms: str | None = None) -> list[dict]:
     """
     Obtiene todos los datos de calificaciones almacenados en Redis.
     Como cada curso ya tiene sus filas del Excel completas, solo necesitamos
@@ -16,6 +21,7 @@ def get_grades_data(redis_client: RedisClient, patterns: list[str]) -> list[dict
     Args:
         redis_client: Cliente de Redis
         patterns: Lista de patrones usados en la búsqueda
+        lms: Nombre del LMS; si se indica, las filas se guardan en el histórico
         
     Returns:
         list: Lista de filas para el Excel
@@ -24,36 +30,62 @@ def get_grades_data(redis_client: RedisClient, patterns: list[str]) -> list[dict
     
     for pattern in patterns:
         logger.info(f"Obteniendo datos de Redis para patrón {pattern}")
-        # Buscar todas las keys que empiecen con el patrón
-        course_keys = redis_client.get_hset_keys_with_prefix(f"{pattern}:")
-        logger.info(f"Encontradas {len(course_keys)} keys para patrón {pattern}")
-        
-        for course_key in course_keys:
+        # Recorrer con SCAN las keys que empiecen con el patrón y leerlas por lotes con pipelines.
+        # Una clave repetida duplicaría las filas del curso; las filas ya están en memoria,
+        # así que recordar las claves no cambia el consumo
+        course_keys_iter = redis_client.iter_keys(redis_client.key(pattern) + ":", unique=True)
+        for course_keys in batched(course_keys_iter, settings.REDIS_PIPELINE_BATCH):
             try:
-                course_data = redis_client.get_hset(course_key)
+                courses_data = redis_client.get_hsets(list(course_keys))
+            except Exception as e:
+                logger.error(f"Error obteniendo datos de {len(course_keys)} keys: {e}")
+                continue
+            for course_key, course_data in zip(course_keys, courses_data):
                 if course_data and "excel_rows" in course_data:
                     # Cada curso tiene una lista de filas ya completas
                     excel_rows = course_data["excel_rows"]
                     all_excel_rows.extend(excel_rows)
                     logger.info(f"Obtenidas {len(excel_rows)} filas de {course_key}")
-            except Exception as e:
-                logger.error(f"Error obteniendo datos de {course_key}: {e}")
-                continue
     
     logger.info(f"Total de filas obtenidas de Redis: {len(all_excel_rows)}")
+    if lms and settings.REPORT_HISTORY_ENABLED:
+        try:
+            with GradesHistory() as history:
+                history.append(lms, all_excel_rows)
+        except Exception as e:
+            logger.error(f"Error guardando el histórico de calificaciones de {lms}: {e}")
     return all_excel_rows
 
 
-def make_grades_report(excel_rows: list[dict], filename: str = None) -> str:
+# Esquema estable del reporte Parquet; las columnas CORTE_N se agregan después
+# como float64 ("SIN CALIFICACION" queda nulo)
+GRADES_SCHEMA = {
+    "PERIODO": "string",
+    "OFG": "string",
+    "PROFESOR NOMBRE": "string",
+    "PROFESOR CEDULA": "string",
+    "NOMBRE": "string",
+    "ESTUDIANTE": "string",
+    "CEDULA_ESTUDIANTE": "string",
+    "ID_ESTUDIANTE": "Int64",
+}
+GRADES_PREFIX_TYPES = {"CORTE_": "float64"}
+# Columnas que van al Parquet y al histórico pero no al Excel
+EXCEL_EXCLUDED_COLUMNS = ["ID_ESTUDIANTE"]
+
+
+def make_grades_report(excel_rows: list[dict], filename: str = None, metadata: dict | None = None) -> str:
     """
-    Crea un archivo Excel con los datos del reporte de calificaciones.
+    Crea un archivo Excel con los datos del reporte de calificaciones y, según
+    settings.REPORT_FORMATS, su versión Parquet.
 
     Args:
         excel_rows: Lista de diccionarios con las filas del reporte (ya completas)
         filename: Nombre del archivo. Si no se especifica, se genera automáticamente.
+        metadata: Columnas constantes del Parquet (p. ej. LMS)
 
     Returns:
-        str: Ruta del archivo Excel creado
+        str: Ruta del archivo Excel creado (o del Parquet si no se genera Excel)
     """
     if not excel_rows:
         logger.warning("No hay datos para generar el reporte")
@@ -67,8 +99,18 @@ def make_grades_report(excel_rows: list[dict], filename: str = None) -> str:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"reporte_calificaciones_{timestamp}.xlsx"
 
+    parquet_path = None
+    if "parquet" in settings.REPORT_FORMATS:
+        parquet_path = write_parquet(
+            df, filename, GRADES_SCHEMA, prefix_types=GRADES_PREFIX_TYPES, metadata=metadata
+        )
+    if "xlsx" not in settings.REPORT_FORMATS:
+        return parquet_path
+
     logger.info(f"Generando archivo Excel: {filename}")
 
+    df = df.drop(columns=EXCEL_EXCLUDED_COLUMNS, errors="ignore")
+
     # Crear archivo Excel
     with pd.ExcelWriter(filename, engine="openpyxl") as writer:
         df.to_excel(writer, sheet_name="Calificaciones", index=False)
@@ -112,18 +154,6 @@ def _format_excel_sheet(writer, df):
         last_row = len(df) + 1
         worksheet.auto_filter.ref = f"A1:{last_col}{last_row}"
 
-    # Ajustar ancho de columnas
-    for column in worksheet.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-
-        adjusted_width = min(max_length + 2, 50)  # Máximo 50 caracteres
-        worksheet.column_dimensions[column_letter].width = adjusted_width
+    # Ajustar ancho de columnas a partir de los datos
+    apply_openpyxl_widths(worksheet, df)
 
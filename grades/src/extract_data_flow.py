@@ -1,12 +1,13 @@
 from collections.abc import Callable
 from src.utils.moodle_client import MoodleClient
 from src.utils.redis_client import RedisClient
+from src.utils.throttle import Throttle, ThrottleConfig
 from src.parsers import extract_course_grade_info
 from src.utils.logging.logger_factory import get_logger
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import batched
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List, Dict, Any
-import math
 
 logger = get_logger()
 
@@ -16,9 +17,7 @@ TEMPLATE = "PLANTILLA"
 def process_course(
     course: Dict[Any, Any],
     pattern: str,
-    moodle_url: str,
-    moodle_token: str,
-    moodle_name: str,
+    moodle_client: MoodleClient,
     ofg_pos: int,
     redis_client: RedisClient,
 ) -> bool:
@@ -26,11 +25,9 @@ def process_course(
     Procesa un curso individual extrayendo su información de calificaciones y guardándola en Redis.
 
     Args:
-        course: Diccionario con información del curso
+        course: Diccionario con los metadatos del curso (core_course_get_courses_by_field)
         pattern: Patrón de búsqueda usado
-        moodle_url: URL de Moodle
-        moodle_token: Token de Moodle
-        moodle_name: Nombre de la instancia de Moodle
+        moodle_client: Cliente de Moodle compartido (un pool de conexiones por LMS)
         ofg_pos: Posición del OFG en el shortname
         redis_client: Cliente de Redis
 
@@ -43,15 +40,14 @@ def process_course(
     logger.info(f"Extrayendo calificaciones del curso {course['shortname']}")
 
     try:
-        moodle_client = MoodleClient(moodle_url, moodle_token, moodle_name)
         # extract_course_grade_info ahora devuelve una lista de filas (diccionarios) para el Excel
         excel_rows = extract_course_grade_info(
-            course["id"], course["shortname"], moodle_client, ofg_pos
+            course["id"], course["shortname"], moodle_client, ofg_pos, course
         )
         
         if excel_rows:
             # Guardamos las filas completas en Redis
-            redis_key = f"{pattern}:{course['shortname']}:{datetime.now().strftime('%Y-%m-%d')}"
+            redis_key = redis_client.key(pattern, course["shortname"], datetime.now().strftime("%Y-%m-%d"))
             redis_client.save_hset(redis_key, {"excel_rows": excel_rows})
             logger.info(f"Calificaciones del curso {course['shortname']} guardadas en Redis ({len(excel_rows)} filas)")
             return True
@@ -64,10 +60,9 @@ def process_course(
 def process_courses_chunk(
     courses_chunk: List[Dict[Any, Any]], 
     pattern: str, 
-    moodle_url: str,
-    moodle_token: str,
-    moodle_name: str,
-    ofg_pos: int
+    moodle_client: MoodleClient,
+    ofg_pos: int,
+    namespace: str = ""
 ) -> int:
     """
     Procesa un chunk/lote de cursos.
@@ -75,69 +70,62 @@ def process_courses_chunk(
     Args:
         courses_chunk: Lista de cursos a procesar
         pattern: Patrón de búsqueda usado
-        moodle_url: URL de Moodle
-        moodle_token: Token de Moodle
-        moodle_name: Nombre de la instancia de Moodle
+        moodle_client: Cliente de Moodle compartido (un pool de conexiones por LMS)
         ofg_pos: Posición del OFG en el shortname
+        namespace: Namespace de Redis de la ejecución
 
     Returns:
         int: Número de cursos procesados exitosamente
     """
-    redis_client = RedisClient()
+    redis_client = RedisClient(namespace)
     return sum(
-        int(process_course(course, pattern, moodle_url, moodle_token, moodle_name, ofg_pos, redis_client))
+        int(process_course(course, pattern, moodle_client, ofg_pos, redis_client))
         for course in courses_chunk
     )
 
 
-def split_data_into_chunks(
-    data: List[Dict[Any, Any]], num_chunks: int
-) -> List[List[Dict[Any, Any]]]:
+def process_data(data: list, workers: int, process_func: Callable, *args, chunk_size: int = 1):
     """
-    Divide la lista de cursos en chunks para procesamiento paralelo.
-
-    Args:
-        data: Lista completa de datos
-        num_chunks: Número de chunks deseados
-
-    Returns:
-        List[List]: Lista de chunks, cada uno conteniendo una porción de datos
-    """
-    if not data:
-        return []
-
-    chunk_size = math.ceil(len(data) / num_chunks)
-    return [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
-
-
-def process_data(data: list, workers: int, process_func: Callable, *args):
-    """
-    Procesa datos en paralelo usando ThreadPoolExecutor.
+    Procesa datos en paralelo usando ThreadPoolExecutor con planificación
+    dinámica: los elementos se envían en chunks de chunk_size a medida que se
+    libera un worker (a lo sumo dos chunks en vuelo por worker), así un chunk
+    de cursos grandes no deja a los demás workers ociosos.
     
     Args:
         data: Lista de datos a procesar
         workers: Número de workers
         process_func: Función de procesamiento
         *args: Argumentos adicionales para la función de procesamiento
+        chunk_size: Elementos por tarea enviada al pool
         
     Returns:
         int: Total de elementos procesados
     """
-    chunks = split_data_into_chunks(data, workers)
+    chunks = batched(data, chunk_size)
     total_processed = 0
     with ThreadPoolExecutor(max_workers=workers) as executor:
-        future_to_chunk = {
-            executor.submit(process_func, chunk, *args): chunk
-            for chunk in chunks
-        }
-        for future in as_completed(future_to_chunk):
-            chunk = future_to_chunk[future]
-            try:
-                processed_count = future.result()
-                total_processed += processed_count
-                logger.info(f"Chunk completado: {processed_count} elementos procesados")
-            except Exception as e:
-                logger.error(f"Error procesando chunk: {str(e)}")
+        in_flight = set()
+
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            in_flight.add(executor.submit(process_func, list(chunk), *args))
+            return True
+
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    processed_count = future.result()
+                    total_processed += processed_count
+                    logger.debug(f"Chunk completado: {processed_count} elementos procesados")
+                except Exception as e:
+                    logger.error(f"Error procesando chunk: {str(e)}")
+                submit_next()
     logger.info(
         f"Procesamiento completado. Total procesados: {total_processed}"
     )
@@ -150,10 +138,12 @@ def extract_grades_data_flow(
     moodle_name: str,
     patterns: List[str],
     ofg_pos: int,
-    max_workers: int = 4
+    max_workers: int | None = None,
+    namespace: str = ""
 ):
     """
     Extrae información de calificaciones de cursos de Moodle de forma paralela.
+    Todos los workers comparten el mismo pool de conexiones HTTP del LMS.
 
     Args:
         moodle_url: URL de Moodle
@@ -162,9 +152,24 @@ def extract_grades_data_flow(
         patterns: Lista de patrones de búsqueda
         ofg_pos: Posición del OFG en el shortname
         max_workers: Número máximo de workers para procesamiento paralelo
+            (por defecto, la concurrencia máxima del throttle)
+        namespace: Namespace de Redis de la ejecución (run:{id}:{lms})
     """
-    moodle_client = MoodleClient(moodle_url, moodle_token, moodle_name)
+    # Los workers que excedan la concurrencia vigente esperan en el throttle. Los
+    # límites son los de settings: grades no tiene configuración por LMS
+    throttle = Throttle(ThrottleConfig(), moodle_name)
+    max_workers = max_workers or throttle.config.max_concurrency
+    with MoodleClient(moodle_url, moodle_token, moodle_name, throttle=throttle) as moodle_client:
+        _extract_patterns(patterns, moodle_client, ofg_pos, max_workers, namespace)
+
 
+def _extract_patterns(
+    patterns: List[str],
+    moodle_client: MoodleClient,
+    ofg_pos: int,
+    max_workers: int,
+    namespace: str,
+):
     for pattern in patterns:
         logger.info(f"Extrayendo información de los cursos con patrón {pattern}")
         courses = moodle_client.search_courses(pattern)
@@ -184,17 +189,21 @@ def extract_grades_data_flow(
             )
             continue
 
+        # Metadatos de todos los cursos en lotes, en lugar de una llamada por curso
+        courses_metadata = moodle_client.get_courses_by_ids(
+            [course["id"] for course in filtered_courses]
+        )
+
         logger.info(
-            f"Procesando {len(filtered_courses)} cursos en paralelo con {max_workers} workers"
+            f"Procesando {len(courses_metadata)} cursos en paralelo con {max_workers} workers"
         )
         process_data(
-            filtered_courses, 
+            courses_metadata, 
             max_workers, 
             process_courses_chunk, 
             pattern,
-            moodle_url,
-            moodle_token,
-            moodle_name,
-            ofg_pos
+            moodle_client,
+            ofg_pos,
+            namespace
         )
 
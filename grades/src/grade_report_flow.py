@@ -13,6 +13,8 @@ def _parse_user_grade(user_grade_items: dict) -> dict:
     user_grades = {
         "ESTUDIANTE": user_grade_items["userfullname"],
         "CEDULA_ESTUDIANTE": user_grade_items["useridnumber"],
+        # Id de Moodle: identifica al estudiante aunque no tenga cédula (useridnumber vacío)
+        "ID_ESTUDIANTE": user_grade_items["userid"],
     }
     for grade_item in user_grade_items["gradeitems"]:
         if grade_item["itemtype"] == "category":
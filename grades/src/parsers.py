@@ -1,4 +1,5 @@
 from src.utils.moodle_client import MoodleClient
+from src.utils.category_cache import get_category_cache
 from src.grade_report_flow import get_course_grade_report
 from src.utils.logging.logger_factory import get_logger
 
@@ -12,6 +13,8 @@ def parse_category_path(
 ) -> tuple[str, str]:
     """
     Obtiene el path de categorías tanto por ID como por nombre.
+    Se resuelve desde la caché del árbol de categorías del LMS; solo si la
+    categoría no está en el árbol se consulta a Moodle categoría por categoría.
     
     Args:
         category_id: ID de la categoría
@@ -20,6 +23,11 @@ def parse_category_path(
     Returns:
         tuple: (category_id_path, category_name_path)
     """
+    category_cache = get_category_cache(moodle_client.url)
+    category_cache.ensure_loaded(moodle_client.get_categories)
+    if resolved := category_cache.resolve_path(category_id):
+        return resolved
+    logger.warning(f"Categoría {category_id} no encontrada en caché, consultando a Moodle")
     category_info = moodle_client.get_category_info(category_id)
     category_id_path = category_info["path"]
     category_name_path = "/".join(
@@ -57,7 +65,8 @@ def extract_course_grade_info(
     course_id: int, 
     course_shortname: str, 
     moodle_client: MoodleClient,
-    ofg_pos: int
+    ofg_pos: int,
+    course: dict | None = None
 ) -> list[dict]:
     """
     Extrae información completa de un curso incluyendo calificaciones.
@@ -68,6 +77,7 @@ def extract_course_grade_info(
         course_shortname: Nombre corto del curso
         moodle_client: Cliente de Moodle
         ofg_pos: Posición del OFG en el shortname (split por "-")
+        course: Metadatos del curso ya obtenidos con get_courses_by_ids (opcional)
         
     Returns:
         list[dict]: Lista de filas para el Excel, cada diccionario es un estudiante con sus calificaciones
@@ -75,8 +85,8 @@ def extract_course_grade_info(
     logger.info(f"Extrayendo información del curso {course_shortname}")
     
     try:
-        # Obtener información básica del curso
-        course = moodle_client.get_course_by_field("id", course_id)
+        # Obtener información básica del curso si no vino en el lote
+        course = course or moodle_client.get_course_by_field("id", course_id)
         if not course:
             logger.warning(f"No se encontró el curso {course_id}")
             return []
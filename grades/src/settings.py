@@ -14,11 +14,70 @@ class Settings(BaseSettings):
     # Posición del OFG en el shortname (split por "-")
     OFG_POS: int = -3
     
+    # Pool de conexiones HTTP hacia Moodle
+    MOODLE_MAX_CONNECTIONS: int = 16
+    MOODLE_MAX_KEEPALIVE_CONNECTIONS: int = 16
+    MOODLE_KEEPALIVE_EXPIRY: float = 30.0
+    MOODLE_TIMEOUT: float = 60.0
+    MOODLE_CONNECT_TIMEOUT: float = 10.0
+
+    # Límites del throttle hacia el LMS. Grades procesa una sola instancia de Moodle por
+    # ejecución y no tiene report_params: estos valores son los límites de esa instancia
+    MOODLE_RATE_LIMIT: float = 0
+    MOODLE_RATE_BURST: int = 10
+    MOODLE_MIN_CONCURRENCY: int = 2
+    MOODLE_INITIAL_CONCURRENCY: int = 8
+    MOODLE_MAX_CONCURRENCY: int = 16
+    MOODLE_LATENCY_TARGET: float = 5.0
+    MOODLE_BACKOFF_FACTOR: float = 0.5
+
+    # Reintentos ante 5xx, 429 y errores de transporte (backoff exponencial con jitter)
+    MOODLE_RETRY_ATTEMPTS: int = 4
+    MOODLE_RETRY_WAIT: float = 1.0
+    MOODLE_RETRY_MAX_WAIT: float = 30.0
+    # Reintentos totales permitidos por ejecución y LMS
+    MOODLE_RETRY_BUDGET: int = 200
+
+    # Cursos por llamada a core_course_get_courses_by_field (field=ids)
+    COURSE_BATCH_SIZE: int = 100
+
+    # Paginación de core_enrol_get_enrolled_users
+    ENROLLED_PAGE_SIZE: int = 200
+    ENROLLED_ONLY_ACTIVE: bool = False
+
+    # Segundos de vida de la caché de categorías (None = durante todo el proceso)
+    CATEGORY_CACHE_TTL: float | None = None
+
     # Base de datos Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: str = ""
+    # Vida de las claves de una ejecución en segundos (0 = sin expiración)
+    REDIS_KEY_TTL: int = 172800
+    # Pool de conexiones compartido por el proceso
+    REDIS_MAX_CONNECTIONS: int = 32
+    REDIS_POOL_TIMEOUT: float = 20.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # COUNT de cada SCAN y tamaño de los lotes de claves que consumen los reportes
+    REDIS_SCAN_COUNT: int = 500
+    # Comandos por pipeline en las lecturas/escrituras por lotes
+    REDIS_PIPELINE_BATCH: int = 100
+
+    # Filas a partir de las cuales el ancho de las columnas se estima sobre una muestra
+    EXCEL_WIDTH_SAMPLE_SIZE: int = 20000
+
+    # Formatos del reporte: "xlsx" y/o "parquet" (esquema estable, para BI y tendencias)
+    REPORT_FORMATS: list[str] = ["xlsx", "parquet"]
+    PARQUET_COMPRESSION: str = "zstd"
+
+    # Histórico diario de las calificaciones (tendencias y diferencias entre días)
+    REPORT_HISTORY_ENABLED: bool = True
+    REPORT_HISTORY_DB_PATH: str = "state/grades_history.sqlite3"
+    # Codec de los valores anidados: "json" (compacto) o "zlib" (comprime sobre el umbral)
+    REDIS_CODEC: str = "zlib"
+    REDIS_COMPRESS_THRESHOLD: int = 1024
+    REDIS_COMPRESS_LEVEL: int = 3
 
     # Configuración de logging
     LOG_TO_CONSOLE: bool = True
@@ -0,0 +1,40 @@
+import base64
+import json
+import zlib
+from typing import Any
+
+from src.settings import settings
+
+# Prefijos de tipo. Empiezan con un carácter de control que nunca inicia un JSON,
+# así los valores guardados antes del codec (JSON plano) se siguen leyendo.
+JSON_TAG = "\x1ej:"
+ZLIB_TAG = "\x1ez:"
+
+
+def encode_value(value: Any) -> str:
+    """
+    Serializa un valor para Redis como JSON compacto. Con REDIS_CODEC="zlib",
+    los valores que superan REDIS_COMPRESS_THRESHOLD bytes se comprimen.
+    """
+    payload = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    if settings.REDIS_CODEC == "zlib" and len(payload) >= settings.REDIS_COMPRESS_THRESHOLD:
+        compressed = zlib.compress(payload.encode("utf-8"), settings.REDIS_COMPRESS_LEVEL)
+        return ZLIB_TAG + base64.b64encode(compressed).decode("ascii")
+    return JSON_TAG + payload
+
+
+def decode_value(value: Any) -> Any:
+    """
+    Inverso de encode_value. Los valores sin prefijo se tratan como JSON plano
+    y, si no lo son, se devuelven tal cual.
+    """
+    if not isinstance(value, str):
+        return value
+    if value.startswith(ZLIB_TAG):
+        return json.loads(zlib.decompress(base64.b64decode(value[len(ZLIB_TAG):])))
+    if value.startswith(JSON_TAG):
+        return json.loads(value[len(JSON_TAG):])
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
@@ -1,8 +1,11 @@
-import json
 import logging
-from redis import Redis
+import threading
+from collections.abc import Iterator
+from itertools import batched
+from redis import BlockingConnectionPool, ConnectionPool, Redis
 from tenacity import stop_after_attempt, wait_fixed, before_log, after_log, retry
 from src.settings import settings
+from src.utils.codecs import encode_value, decode_value
 from src.utils.logging.logger_factory import get_logger
 
 logger = get_logger()
@@ -11,16 +14,48 @@ MAX_ATTEMPTS = 3
 WAIT_TIME = 1
 
 
+_pool: ConnectionPool | None = None
+_pool_checked = False
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPool:
+    """
+    Pool de conexiones compartido por todo el proceso. Es bloqueante: cuando se
+    alcanza REDIS_MAX_CONNECTIONS los workers esperan una conexión libre en
+    lugar de abrir más.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BlockingConnectionPool(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                password=settings.REDIS_PASSWORD,
+                decode_responses=True,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            )
+        return _pool
+
+
+def run_namespace(run_id: str, lms: str) -> str:
+    return f"run:{run_id}:{lms}"
+
+
 class RedisClient:
-    def __init__(self):
-        self.client = Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            password=settings.REDIS_PASSWORD,
-            decode_responses=True
-        )
-        self._check_connection()
+    def __init__(self, namespace: str = ""):
+        global _pool_checked
+        # Todas las claves de una ejecución viven bajo run:{id}:{lms} (ver run_namespace)
+        self.namespace = namespace
+        self.client = Redis(connection_pool=get_connection_pool())
+        # La conexión se verifica una sola vez por proceso, no por cada cliente
+        with _pool_lock:
+            if not _pool_checked:
+                self._check_connection()
+                _pool_checked = True
     
     @retry(
         stop=stop_after_attempt(MAX_ATTEMPTS),
@@ -38,16 +73,26 @@ class RedisClient:
             raise e
         
 
+    def key(self, *parts) -> str:
+        return ":".join(str(part) for part in (self.namespace, *parts) if part != "")
+
+    def _expire(self, client, key: str):
+        if settings.REDIS_KEY_TTL > 0:
+            client.expire(key, settings.REDIS_KEY_TTL)
+
     def _parse_data(self, data: dict) -> dict:
         data = {
-            key: json.dumps(value) if isinstance(value, (list, dict)) else value
+            key: encode_value(value) if isinstance(value, (list, dict)) else value
             for key, value in data.items()
         }
         return data
 
     def save_hset(self, key: str, data: dict):
         try:
-            self.client.hset(key, mapping=self._parse_data(data))
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hset(key, mapping=self._parse_data(data))
+            self._expire(pipe, key)
+            pipe.execute()
             logger.info(f"Datos guardados en Redis para la clave: {key}")
         except Exception as e:
             logger.error(f"Error al guardar datos en Redis: {e}")
@@ -62,12 +107,71 @@ class RedisClient:
         
     def parse_hset(self, data: dict) -> dict:
         for key, value in data.items():
-            try:
-                data[key] = json.loads(value) if isinstance(value, str) else value
-            except Exception as e:
-                data[key] = value
+            data[key] = decode_value(value)
         return data
         
+    def get_hsets(self, keys: list[str]) -> list[dict]:
+        """
+        Lee varios hashes en un solo round trip usando un pipeline.
+        """
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.hgetall(key)
+            return [self.parse_hset(data) for data in pipe.execute()]
+        except Exception as e:
+            logger.error(f"Error al obtener datos de Redis: {e}")
+            raise e
+
+    def save_hsets(self, data: dict[str, dict]):
+        """
+        Guarda varios hashes (clave -> datos) en un solo round trip.
+        """
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in data.items():
+                pipe.hset(key, mapping=self._parse_data(value))
+                self._expire(pipe, key)
+            pipe.execute()
+            logger.info(f"Datos guardados en Redis para {len(data)} claves")
+        except Exception as e:
+            logger.error(f"Error al guardar datos en Redis: {e}")
+            raise e
+
+    def push_lists(self, data: dict[str, list]):
+        """
+        Agrega valores al final de varias listas (clave -> valores) en un solo round trip.
+        """
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, values in data.items():
+                if values:
+                    pipe.rpush(key, *values)
+                    self._expire(pipe, key)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error al guardar listas en Redis: {e}")
+            raise e
+
+    def drain_list(self, key: str, batch_size: int | None = None) -> Iterator[list[str]]:
+        """
+        Vacía una lista por lotes con LRANGE + LTRIM en una transacción,
+        en lugar de un LPOP por elemento.
+        """
+        batch_size = batch_size or settings.REDIS_PIPELINE_BATCH
+        try:
+            while True:
+                pipe = self.client.pipeline(transaction=True)
+                pipe.lrange(key, 0, batch_size - 1)
+                pipe.ltrim(key, batch_size, -1)
+                values, _ = pipe.execute()
+                if not values:
+                    return
+                yield values
+        except Exception as e:
+            logger.error(f"Error al vaciar la lista {key} de Redis: {e}")
+            raise e
+
     def delete_hset(self, key: str):
         try:
             self.client.delete(key)
@@ -76,16 +180,50 @@ class RedisClient:
             logger.error(f"Error al eliminar datos de Redis: {e}")
             raise e
         
-    def get_hset_keys(self, prefix: str) -> list[str]:
+    def iter_keys(
+        self, prefix: str, count: int | None = None, unique: bool = False
+    ) -> Iterator[str]:
+        """
+        Recorre las claves con el prefijo usando SCAN, sin bloquear Redis como KEYS
+        y sin tener todas las claves en memoria. SCAN puede devolver una clave más
+        de una vez: los consumidores deben tolerarlo o pedir unique=True, que
+        filtra las repetidas a costa de recordar cada clave devuelta.
+        """
         try:
-            return self.client.keys(f"{prefix}*")
+            seen = set()
+            for key in self.client.scan_iter(
+                match=f"{prefix}*", count=count or settings.REDIS_SCAN_COUNT
+            ):
+                if unique:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                yield key
         except Exception as e:
             logger.error(f"Error al obtener claves de Redis: {e}")
             raise e
-        
-    def get_hset_keys_with_prefix(self, prefix: str) -> list[str]:
+
+    def delete_namespace(self, batch_size: int | None = None) -> int:
+        """
+        Elimina todas las claves del namespace con UNLINK por lotes. Reemplaza al
+        flushall: solo se borra la ejecución actual, no el resto de Redis.
+        """
+        if not self.namespace:
+            raise ValueError("El cliente de Redis no tiene namespace que eliminar")
         try:
-            return self.client.keys(f"{prefix}*")
+            deleted = 0
+            for keys in batched(
+                self.iter_keys(f"{self.namespace}:"), batch_size or settings.REDIS_SCAN_COUNT
+            ):
+                deleted += self.client.unlink(*keys)
+            logger.info(f"Eliminadas {deleted} claves del namespace {self.namespace}")
+            return deleted
         except Exception as e:
-            logger.error(f"Error al obtener claves de Redis: {e}")
+            logger.error(f"Error al eliminar el namespace {self.namespace} de Redis: {e}")
             raise e
+
+    def get_hset_keys(self, prefix: str) -> list[str]:
+        return list(self.iter_keys(prefix, unique=True))
+        
+    def get_hset_keys_with_prefix(self, prefix: str) -> list[str]:
+        return list(self.iter_keys(prefix, unique=True))
@@ -0,0 +1,176 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import date
+
+from src.settings import settings
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+CUT_COLUMN = re.compile(r"^CORTE_(\d+)$")
+
+
+class GradesHistory:
+    """
+    Histórico local de los reportes de calificaciones: una fila por estudiante,
+    curso y corte en cada día, con clave LMS, periodo, corte y fecha. Las notas
+    se guardan como número ("SIN CALIFICACION" queda nula con graded = 0), de
+    modo que las tendencias y diferencias se consultan sin volver a abrir los
+    Excel. Un nuevo reporte del mismo día reemplaza al anterior completo.
+    """
+
+    def __init__(self, path: str | None = None):
+        path = path or settings.REPORT_HISTORY_DB_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.execute(
+                """
+                create table if not exists grades_history (
+                    lms text not null,
+                    period text not null,
+                    cut integer not null,
+                    report_date text not null,
+                    course_shortname text not null,
+                    teacher_cedula text,
+                    student_id text not null,
+                    student_cedula text,
+                    student_name text,
+                    grade real,
+                    graded integer not null,
+                    primary key (lms, period, cut, report_date, course_shortname, student_id)
+                )"""
+            )
+            self._conn.execute(
+                "create index if not exists ix_grades_course "
+                "on grades_history (course_shortname, report_date)"
+            )
+            self._conn.execute(
+                "create index if not exists ix_grades_teacher "
+                "on grades_history (teacher_cedula, report_date)"
+            )
+            self._conn.execute(
+                "create index if not exists ix_grades_date "
+                "on grades_history (lms, report_date)"
+            )
+
+    def __enter__(self) -> "GradesHistory":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    @staticmethod
+    def _student_id(row: dict) -> str:
+        """
+        Clave del estudiante: el id de Moodle; si la fila no lo trae, la cédula
+        y, si tampoco hay cédula (useridnumber vacío), el nombre.
+        """
+        if row.get("ID_ESTUDIANTE") is not None:
+            return f"id:{row['ID_ESTUDIANTE']}"
+        if row.get("CEDULA_ESTUDIANTE"):
+            return f"cedula:{row['CEDULA_ESTUDIANTE']}"
+        return f"nombre:{row.get('ESTUDIANTE')}"
+
+    def append(self, lms: str, rows: list[dict], report_date: date | None = None) -> int:
+        """
+        Guarda las filas del reporte de calificaciones como la instantánea del
+        día, una fila por cada columna CORTE_N. La instantánea anterior del
+        mismo día se borra completa; un reporte vacío no toca el histórico.
+
+        Returns:
+            int: Número de notas guardadas
+        """
+        report_date = (report_date or date.today()).isoformat()
+        records = []
+        for row in rows:
+            student_id = self._student_id(row)
+            for column, value in row.items():
+                match = CUT_COLUMN.match(column)
+                if not match:
+                    continue
+                graded = isinstance(value, (int, float))
+                records.append(
+                    (
+                        lms,
+                        str(row.get("PERIODO") or ""),
+                        int(match.group(1)),
+                        report_date,
+                        row["NOMBRE"],
+                        row.get("PROFESOR CEDULA"),
+                        student_id,
+                        row.get("CEDULA_ESTUDIANTE") or None,
+                        row.get("ESTUDIANTE"),
+                        float(value) if graded else None,
+                        int(graded),
+                    )
+                )
+        if not records:
+            return 0
+        with self._lock, self._conn:
+            self._conn.execute(
+                "delete from grades_history where lms = ? and report_date = ?",
+                (lms, report_date),
+            )
+            self._conn.executemany(
+                "insert or replace into grades_history "
+                "(lms, period, cut, report_date, course_shortname, teacher_cedula, "
+                "student_id, student_cedula, student_name, grade, graded) "
+                "values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+        logger.info(f"{len(records)} notas de {lms} guardadas en el histórico del {report_date}")
+        return len(records)
+
+    def _query(self, sql: str, params: tuple) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def course_trend(self, course_shortname: str, lms: str | None = None) -> list[dict]:
+        """
+        Por día y corte: estudiantes, estudiantes calificados y promedio del curso.
+        """
+        return self._query(
+            "select report_date, cut, count(*) as estudiantes, sum(graded) as calificados, "
+            "avg(grade) as promedio from grades_history "
+            "where course_shortname = ? and (? is null or lms = ?) "
+            "group by report_date, cut order by report_date, cut",
+            (course_shortname, lms, lms),
+        )
+
+    def teacher_trend(self, teacher_cedula: str) -> list[dict]:
+        """
+        Por día, curso y corte: avance de calificación de los cursos de un docente.
+        """
+        return self._query(
+            "select report_date, course_shortname, cut, count(*) as estudiantes, "
+            "sum(graded) as calificados, avg(grade) as promedio from grades_history "
+            "where teacher_cedula = ? group by report_date, course_shortname, cut "
+            "order by report_date, course_shortname, cut",
+            (teacher_cedula,),
+        )
+
+    def deltas(self, lms: str, from_date: date, to_date: date) -> list[dict]:
+        """
+        Notas que cambiaron (o se registraron) entre dos fechas.
+        """
+        return self._query(
+            "select new.period, new.cut, new.course_shortname, new.teacher_cedula, "
+            "new.student_cedula, new.student_name, old.grade as nota_antes, new.grade "
+            "from grades_history new join grades_history old "
+            "on old.lms = new.lms and old.period = new.period and old.cut = new.cut "
+            "and old.course_shortname = new.course_shortname "
+            "and old.student_id = new.student_id "
+            "where new.lms = ? and old.report_date = ? and new.report_date = ? "
+            "and old.grade is not new.grade "
+            "order by new.course_shortname, new.student_name, new.cut",
+            (lms, from_date.isoformat(), to_date.isoformat()),
+        )
@@ -0,0 +1,79 @@
+import threading
+from typing import Any
+
+import httpx
+from tenacity import RetryCallState, retry, stop_after_attempt, wait_random_exponential
+
+from src.settings import settings
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+
+class MoodleError(Exception):
+    """
+    Respuesta de Moodle con "exception" (token inválido, parámetros, permisos):
+    es un error permanente y no se reintenta.
+    """
+
+
+def check_moodle_response(data: Any) -> Any:
+    if isinstance(data, dict) and "exception" in data:
+        raise MoodleError(f"Error con Moodle: {str(data)}")
+    return data
+
+
+class RetryBudget:
+    """
+    Reintentos disponibles para toda una ejecución contra un LMS. Cuando se
+    agota, los errores transitorios se propagan de inmediato, así un servidor
+    caído no multiplica la duración de la ejecución.
+    """
+
+    def __init__(self, size: int | None = None):
+        self.remaining = settings.MOODLE_RETRY_BUDGET if size is None else size
+        self._lock = threading.Lock()
+
+    def consume(self) -> bool:
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            if self.remaining == 0:
+                logger.warning("Presupuesto de reintentos hacia Moodle agotado")
+            return True
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Errores que vale la pena reintentar: timeouts y fallos de transporte, 5xx y 429.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.is_server_error or error.response.status_code == 429
+    return isinstance(error, httpx.TransportError)
+
+
+def _should_retry(retry_state: RetryCallState) -> bool:
+    if not retry_state.outcome.failed or not is_transient(retry_state.outcome.exception()):
+        return False
+    # El primer argumento del método decorado es el cliente, dueño del presupuesto
+    return retry_state.args[0].retry_budget.consume()
+
+
+def _log_retry(retry_state: RetryCallState):
+    logger.warning(
+        f"Reintento {retry_state.attempt_number} de {retry_state.fn.__name__} "
+        f"en {retry_state.next_action.sleep:.1f}s tras el error: {retry_state.outcome.exception()}"
+    )
+
+
+# Backoff exponencial con jitter completo; sirve para métodos síncronos y async
+moodle_retry = retry(
+    retry=_should_retry,
+    stop=stop_after_attempt(settings.MOODLE_RETRY_ATTEMPTS),
+    wait=wait_random_exponential(
+        multiplier=settings.MOODLE_RETRY_WAIT, max=settings.MOODLE_RETRY_MAX_WAIT
+    ),
+    before_sleep=_log_retry,
+    reraise=True,
+)
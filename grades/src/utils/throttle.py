@@ -0,0 +1,134 @@
+import threading
+import time
+from contextlib import contextmanager
+from collections.abc import Iterator
+
+from pydantic import BaseModel
+
+from src.settings import settings
+from src.utils.logging.logger_factory import get_logger
+
+logger = get_logger()
+
+
+class ThrottleConfig(BaseModel):
+    """
+    Límites de peticiones hacia una instancia de Moodle. En grades vienen
+    siempre de settings (MOODLE_RATE_LIMIT, MOODLE_*_CONCURRENCY...), ya que
+    cada ejecución procesa un solo LMS configurado por variables de entorno.
+    """
+    # Peticiones por segundo (0 = sin límite) y ráfaga máxima del token bucket
+    rate_limit: float = settings.MOODLE_RATE_LIMIT
+    burst: int = settings.MOODLE_RATE_BURST
+    # Peticiones en vuelo: arranca en initial y se mueve entre min y max (AIMD)
+    min_concurrency: int = settings.MOODLE_MIN_CONCURRENCY
+    initial_concurrency: int = settings.MOODLE_INITIAL_CONCURRENCY
+    max_concurrency: int = settings.MOODLE_MAX_CONCURRENCY
+    # Latencia (s) por debajo de la cual una respuesta correcta permite crecer
+    latency_target: float = settings.MOODLE_LATENCY_TARGET
+    # Factor de reducción ante 5xx, timeouts o respuestas con "exception"
+    backoff_factor: float = settings.MOODLE_BACKOFF_FACTOR
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe: acquire bloquea hasta que haya un token disponible.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AIMDLimiter:
+    """
+    Límite de peticiones en vuelo con incremento aditivo y reducción
+    multiplicativa: cada ventana de respuestas rápidas y correctas suma uno al
+    límite; un fallo lo multiplica por backoff_factor, a lo sumo una vez por
+    latency_target para que una ráfaga de errores no lo lleve al mínimo de golpe.
+    """
+
+    def __init__(self, config: ThrottleConfig, name: str = ""):
+        self.name = name
+        self.minimum = max(config.min_concurrency, 1)
+        self.maximum = max(config.max_concurrency, self.minimum)
+        self.limit = float(min(max(config.initial_concurrency, self.minimum), self.maximum))
+        self.latency_target = config.latency_target
+        self.backoff_factor = config.backoff_factor
+        self._in_flight = 0
+        self._last_backoff = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float, ok: bool):
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if not ok:
+                if now - self._last_backoff >= self.latency_target:
+                    self.limit = max(self.minimum, self.limit * self.backoff_factor)
+                    self._last_backoff = now
+                    logger.warning(f"Concurrencia hacia {self.name} reducida a {int(self.limit)}")
+            elif latency <= self.latency_target and self.limit < self.maximum:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class ThrottleSlot:
+    def __init__(self):
+        self.ok = True
+
+    def failed(self):
+        self.ok = False
+
+
+class Throttle:
+    """
+    Rate limiter y control de concurrencia de un MoodleClient: todas las
+    peticiones de los workers del LMS pasan por slot().
+    """
+
+    def __init__(self, config: ThrottleConfig | None = None, name: str = ""):
+        self.config = config or ThrottleConfig()
+        self._bucket = TokenBucket(self.config.rate_limit, self.config.burst)
+        self._limiter = AIMDLimiter(self.config, name)
+
+    @property
+    def concurrency(self) -> int:
+        return int(self._limiter.limit)
+
+    @contextmanager
+    def slot(self) -> Iterator[ThrottleSlot]:
+        self._bucket.acquire()
+        self._limiter.acquire()
+        slot = ThrottleSlot()
+        start = time.monotonic()
+        try:
+            yield slot
+        except Exception:
+            slot.failed()
+            raise
+        finally:
+            self._limiter.release(time.monotonic() - start, slot.ok)